@@ -0,0 +1,66 @@
+# Corpus indexing: read text files, chunk them, embed the chunks, upsert
+# them into the pgvector store in batches and build the vector index at the end.
+
+import hashlib
+import os
+
+from embeddings.sentence_transformers import get_embeddings
+from rag.chunker import chunk_text
+from rag.store_pgvector import finish_namespace_load, upsert_documents_pgvector
+
+TEXT_EXTENSIONS = ('.txt', '.md')
+
+
+def corpus_files(corpus_path):
+    if os.path.isfile(corpus_path):
+        return [corpus_path]
+    paths = []
+    for root, _, names in os.walk(corpus_path):
+        paths.extend(os.path.join(root, name) for name in names if name.lower().endswith(TEXT_EXTENSIONS))
+    return sorted(paths)
+
+
+def index_corpus(corpus_path, namespace='default', batch_size=64, on_progress=None, on_batch=None):
+    """Index every text file under ``corpus_path`` into ``namespace``.
+
+    ``on_progress(fraction, message)`` is called after each file and
+    ``on_batch(summary)`` after each upserted batch. Returns a summary dict.
+    """
+    files = corpus_files(corpus_path)
+    if not files:
+        raise ValueError(f'No {"/".join(TEXT_EXTENSIONS)} files found under {corpus_path}')
+
+    pending = []
+    upserted = 0
+
+    def flush():
+        nonlocal upserted
+        if not pending:
+            return
+        embeddings = get_embeddings([doc['text'] for doc in pending])
+        for doc, embedding in zip(pending, embeddings):
+            doc['embedding'] = embedding
+        upserted += upsert_documents_pgvector(pending, namespace, create_index=False)['upserted']
+        if on_batch:
+            on_batch({'upserted': upserted, 'last_source': pending[-1]['metadata']['source']})
+        pending.clear()
+
+    for i, path in enumerate(files, 1):
+        with open(path, encoding='utf-8', errors='replace') as f:
+            text = f.read()
+        source = os.path.relpath(path, corpus_path) if os.path.isdir(corpus_path) else os.path.basename(path)
+        for n, chunk in enumerate(chunk_text(text)):
+            # Stable ids so re-indexing a file updates its chunks in place
+            doc_id = hashlib.sha256(f'{source}:{n}'.encode('utf-8')).hexdigest()[:32]
+            pending.append({'id': doc_id, 'text': chunk, 'metadata': {'source': source, 'chunk': n}})
+            if len(pending) >= batch_size:
+                flush()
+        if on_progress:
+            on_progress(i / len(files), f'Indexed {source} ({i}/{len(files)})')
+    flush()
+    # Index once the whole corpus is loaded: cheaper than maintaining it row by
+    # row, and IVFFlat clusters need the full data
+    if on_progress:
+        on_progress(1.0, 'Building the vector index')
+    finish_namespace_load(namespace)
+    return {'files': len(files), 'chunks': upserted, 'namespace': namespace}
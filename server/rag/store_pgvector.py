@@ -1,11 +1,303 @@
-# Placeholder for pgvector store
+# pgvector document store
+#
+# Connections come from a shared thread-safe pool; callers wait for a free
+# one. Upserts bulk-load through a binary COPY into a temporary staging table
+# and are merged with a single INSERT ... ON CONFLICT, instead of one INSERT
+# per row. Each namespace gets its own partial HNSW or IVFFlat index, built
+# under a Postgres advisory lock so concurrent callers (threads or processes)
+# never race on it, and search parameters (ef_search / probes) are set per query.
+# query_documents_pgvector_batch answers many query vectors in one round trip.
 
-def upsert_documents_pgvector(docs, namespace="default"):
-    # Dummy function to simulate upserting documents to pgvector
-    print(f"Upserting {len(docs)} documents to pgvector in namespace: {namespace}")
-    return {"status": "success", "message": "Documents upserted to pgvector."}
+import hashlib
+import io
+import json
+import struct
+import threading
+from contextlib import contextmanager
 
-def query_documents_pgvector(query_embedding, top_k=5, namespace="default"):
-    # Dummy function to simulate querying documents from pgvector
-    print(f"Querying pgvector in namespace: {namespace} for top {top_k} results.")
-    return [{'id': 'doc1', 'text': 'dummy document content', 'metadata': {}}]
+from config import Config
+
+METRIC_OPS = {
+    'l2': ('vector_l2_ops', '<->'),
+    'cosine': ('vector_cosine_ops', '<=>'),
+    'ip': ('vector_ip_ops', '<#>'),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+# psycopg2's pool raises PoolError past maxconn; this makes callers wait instead
+_pool_slots = threading.BoundedSemaphore(Config.PGVECTOR_POOL_MAX)
+# (namespace, method) pairs known to have a valid index / being built in the background
+_indexed_namespaces = set()
+_index_builds = set()
+_index_lock = threading.Lock()
+
+_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+_COPY_TRAILER = struct.pack('!h', -1)
+_COPY_COLUMNS = '(namespace, id, content, embedding, metadata)'
+
+
+def get_pool():
+    """Create (once) and return the shared connection pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from psycopg2.pool import ThreadedConnectionPool
+            _pool = ThreadedConnectionPool(Config.PGVECTOR_POOL_MIN, Config.PGVECTOR_POOL_MAX, Config.DATABASE_URL)
+        return _pool
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+@contextmanager
+def connection(autocommit=False):
+    """Borrow a pooled connection; commits on success and rolls back on error.
+
+    Blocks up to PGVECTOR_POOL_TIMEOUT seconds when every connection is in use.
+    """
+    pool = get_pool()
+    if not _pool_slots.acquire(timeout=Config.PGVECTOR_POOL_TIMEOUT):
+        raise TimeoutError(f'No pgvector connection available after {Config.PGVECTOR_POOL_TIMEOUT:g}s')
+    try:
+        conn = pool.getconn()
+        try:
+            conn.autocommit = autocommit
+            yield conn
+            if not autocommit:
+                conn.commit()
+        except Exception:
+            if not autocommit and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if not conn.closed:
+                conn.autocommit = False
+            pool.putconn(conn)
+    finally:
+        _pool_slots.release()
+
+
+def vector_literal(embedding):
+    return '[' + ','.join(repr(float(x)) for x in embedding) + ']'
+
+
+def _copy_field(data):
+    if data is None:
+        return struct.pack('!i', -1)
+    return struct.pack('!i', len(data)) + data
+
+
+def encode_copy_binary(docs, namespace):
+    """Encode documents in PostgreSQL's binary COPY format for the columns in _COPY_COLUMNS."""
+    out = io.BytesIO()
+    out.write(_COPY_HEADER)
+    for doc in docs:
+        embedding = doc.get('embedding')
+        metadata = doc.get('metadata')
+        out.write(struct.pack('!h', 5))
+        out.write(_copy_field(namespace.encode('utf-8')))
+        out.write(_copy_field(str(doc['id']).encode('utf-8')))
+        out.write(_copy_field(doc.get('text', doc.get('content', '')).encode('utf-8')))
+        # pgvector binary format: int16 dimensions, int16 unused, float4 values
+        out.write(_copy_field(None if embedding is None else
+                              struct.pack(f'!hh{len(embedding)}f', len(embedding), 0, *embedding)))
+        # jsonb binary format: version byte followed by the JSON text
+        out.write(_copy_field(None if metadata is None else b'\x01' + json.dumps(metadata).encode('utf-8')))
+    out.write(_COPY_TRAILER)
+    out.seek(0)
+    return out
+
+
+def _index_name(namespace, method):
+    return f"documents_{method}_{hashlib.sha256(namespace.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _index_state(cur, name):
+    """None if the index does not exist, otherwise whether it is valid."""
+    cur.execute('SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = %s',
+                (name,))
+    row = cur.fetchone()
+    return None if row is None else row[0]
+
+
+@contextmanager
+def _advisory_lock(cur, name):
+    """Hold a session-level advisory lock keyed on the index name."""
+    cur.execute('SELECT pg_advisory_lock(hashtext(%s))', (name,))
+    try:
+        yield
+    finally:
+        cur.execute('SELECT pg_advisory_unlock(hashtext(%s))', (name,))
+
+
+def ensure_namespace_index(namespace='default', method=None, metric=None, m=None, ef_construction=None, lists=None):
+    """Create the partial ANN index for ``namespace`` if it does not exist yet.
+
+    The index is built CONCURRENTLY, so writes to ``documents`` are not blocked
+    while it builds. IVFFlat clusters are computed from the rows present at
+    build time; build it after loading (see finish_namespace_load).
+
+    Blocks until the index is built. Builders of the same index serialize on an
+    advisory lock, so an invalid index seen while holding it was left behind by
+    an interrupted build rather than one still in progress.
+    """
+    from psycopg2 import sql
+
+    method = method or Config.PGVECTOR_INDEX_METHOD
+    metric = metric or Config.PGVECTOR_METRIC
+    if method not in ('hnsw', 'ivfflat'):
+        raise ValueError(f'Unknown index method: {method}')
+    ops = METRIC_OPS[metric][0]
+    if method == 'hnsw':
+        params = sql.SQL('m = {}, ef_construction = {}').format(
+            sql.Literal(int(m or Config.HNSW_M)), sql.Literal(int(ef_construction or Config.HNSW_EF_CONSTRUCTION)))
+    else:
+        params = sql.SQL('lists = {}').format(sql.Literal(int(lists or Config.IVFFLAT_LISTS)))
+
+    name = _index_name(namespace, method)
+    statement = sql.SQL(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON documents USING {method} (embedding {ops}) '
+        'WITH ({params}) WHERE namespace = {namespace}'
+    ).format(
+        name=sql.Identifier(name),
+        method=sql.SQL(method),
+        ops=sql.SQL(ops),
+        params=params,
+        namespace=sql.Literal(namespace),
+    )
+    # CONCURRENTLY cannot run inside a transaction block
+    with connection(autocommit=True) as conn, conn.cursor() as cur, _advisory_lock(cur, name):
+        state = _index_state(cur, name)
+        if state is False:
+            # Left behind by an interrupted concurrent build; IF NOT EXISTS would keep it
+            cur.execute(sql.SQL('DROP INDEX CONCURRENTLY IF EXISTS {}').format(sql.Identifier(name)))
+        if not state:
+            cur.execute(statement)
+    with _index_lock:
+        _indexed_namespaces.add((namespace, method))
+
+
+def _ensure_index_in_background(namespace, method):
+    """Build a missing namespace index on a daemon thread, once per process."""
+    key = (namespace, method)
+    with _index_lock:
+        if key in _indexed_namespaces or key in _index_builds:
+            return
+        _index_builds.add(key)
+
+    def build():
+        try:
+            ensure_namespace_index(namespace, method)
+        except Exception as e:
+            print(f"Building the {method} index for namespace {namespace!r} failed: {e}")
+        finally:
+            with _index_lock:
+                _index_builds.discard(key)
+
+    threading.Thread(target=build, name=f'pgvector-index-{namespace}', daemon=True).start()
+
+
+def rebuild_namespace_index(namespace='default', method=None):
+    """Rebuild a namespace index without blocking writes (e.g. IVFFlat after a large load)."""
+    from psycopg2 import sql
+
+    method = method or Config.PGVECTOR_INDEX_METHOD
+    name = _index_name(namespace, method)
+    with connection(autocommit=True) as conn, conn.cursor() as cur, _advisory_lock(cur, name):
+        cur.execute(sql.SQL('REINDEX INDEX CONCURRENTLY {}').format(sql.Identifier(name)))
+
+
+def drop_namespace_index(namespace='default', method=None):
+    from psycopg2 import sql
+
+    method = method or Config.PGVECTOR_INDEX_METHOD
+    name = _index_name(namespace, method)
+    with connection(autocommit=True) as conn, conn.cursor() as cur, _advisory_lock(cur, name):
+        cur.execute(sql.SQL('DROP INDEX CONCURRENTLY IF EXISTS {}').format(sql.Identifier(name)))
+    with _index_lock:
+        _indexed_namespaces.discard((namespace, method))
+
+
+def finish_namespace_load(namespace='default', method=None):
+    """Build (or, for IVFFlat, rebuild) the namespace index after a bulk load."""
+    method = method or Config.PGVECTOR_INDEX_METHOD
+    with connection() as conn, conn.cursor() as cur:
+        exists = _index_state(cur, _index_name(namespace, method))
+    if exists and method == 'ivfflat':
+        # Recompute the IVFFlat clusters from the rows that are now loaded
+        rebuild_namespace_index(namespace, method)
+    else:
+        ensure_namespace_index(namespace, method)
+
+
+def upsert_documents_pgvector(docs, namespace="default", create_index=True):
+    """Bulk upsert ``docs`` ({'id', 'text', 'embedding', 'metadata'}) into ``namespace``.
+
+    A missing HNSW index is built on a background thread after the first
+    upsert unless ``create_index`` is False; the build holds one pool
+    connection for its duration, and queries fall back to a sequential scan
+    until it is ready. IVFFlat indexes are never built here, since a first small batch
+    would give poor clusters; bulk loaders pass create_index=False and call
+    finish_namespace_load when done.
+    """
+    # Last occurrence wins; ON CONFLICT cannot touch the same row twice in one statement
+    unique = list({str(doc['id']): doc for doc in docs}.values())
+    if not unique:
+        return {"status": "success", "message": "No documents to upsert.", "upserted": 0}
+
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS documents_staging '
+            '(LIKE documents INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+        )
+        cur.copy_expert(f'COPY documents_staging {_COPY_COLUMNS} FROM STDIN WITH (FORMAT BINARY)',
+                        encode_copy_binary(unique, namespace))
+        cur.execute(
+            f'INSERT INTO documents {_COPY_COLUMNS} '
+            f'SELECT namespace, id, content, embedding, metadata FROM documents_staging '
+            f'ON CONFLICT (namespace, id) DO UPDATE SET '
+            f'content = EXCLUDED.content, embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata'
+        )
+
+    if create_index and Config.PGVECTOR_INDEX_METHOD == 'hnsw':
+        _ensure_index_in_background(namespace, 'hnsw')
+    return {"status": "success", "message": "Documents upserted to pgvector.", "upserted": len(unique)}
+
+
+def _set_search_params(cur, ef_search=None, probes=None):
+    cur.execute('SET LOCAL hnsw.ef_search = %s', (int(ef_search or Config.HNSW_EF_SEARCH),))
+    cur.execute('SET LOCAL ivfflat.probes = %s', (int(probes or Config.IVFFLAT_PROBES),))
+
+
+def query_documents_pgvector_batch(query_embeddings, top_k=5, namespace="default", metric=None, ef_search=None, probes=None):
+    """Return the ``top_k`` nearest documents for each query embedding, in one round trip."""
+    if not query_embeddings:
+        return []
+    operator = METRIC_OPS[metric or Config.PGVECTOR_METRIC][1]
+    results = [[] for _ in query_embeddings]
+    with connection() as conn, conn.cursor() as cur:
+        _set_search_params(cur, ef_search, probes)
+        cur.execute(
+            f'SELECT q.ord, d.id, d.content, d.metadata, d.distance '
+            f'FROM unnest(%s::vector[]) WITH ORDINALITY AS q(embedding, ord) '
+            f'CROSS JOIN LATERAL ('
+            f'  SELECT id, content, metadata, embedding {operator} q.embedding AS distance '
+            f'  FROM documents WHERE namespace = %s '
+            f'  ORDER BY embedding {operator} q.embedding LIMIT %s'
+            f') d ORDER BY q.ord, d.distance',
+            ([vector_literal(e) for e in query_embeddings], namespace, int(top_k)),
+        )
+        for ord_, doc_id, content, metadata, distance in cur.fetchall():
+            results[ord_ - 1].append({'id': doc_id, 'text': content, 'metadata': metadata or {}, 'distance': distance})
+    return results
+
+
+def query_documents_pgvector(query_embedding, top_k=5, namespace="default", **params):
+    """Return the ``top_k`` nearest documents for a single query embedding."""
+    return query_documents_pgvector_batch([query_embedding], top_k, namespace, **params)[0]
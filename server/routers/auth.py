@@ -1,4 +1,5 @@
 from flask import Blueprint, jsonify, request
+from services.scheduler import client_id, describe_limits
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -10,4 +11,9 @@ def exchange_token():
 @auth_bp.route('/me', methods=['GET'])
 def get_me():
     # Placeholder for getting user capabilities
-    return jsonify({'message': 'User capabilities endpoint', 'capabilities': ['summarize', 'chat']}), 200
\ No newline at end of file
+    return jsonify({
+        'message': 'User capabilities endpoint',
+        'capabilities': ['summarize', 'chat'],
+        'client_id': client_id(),
+        'limits': describe_limits()
+    }), 200
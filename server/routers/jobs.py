@@ -0,0 +1,87 @@
+import json
+import time
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from config import Config
+from services import jobs
+from services.scheduler import client_id
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# Kinds that can be submitted with a plain JSON payload. PDF jobs need an
+# upload (POST /api/pdf/extract?async=1) and corpus indexing reads server-side
+# paths, so it is only submitted locally (scripts/index_corpus.py --async).
+API_KINDS = {'youtube_asr'}
+
+_KEEPALIVE_SECONDS = 15
+
+@jobs_bp.route('', methods=['POST'])
+def submit_job():
+    # Queue a job and return its id immediately
+    data = request.json
+    kind = data.get('kind') if data else None
+    payload = data.get('payload', {}) if data else {}
+    if kind not in API_KINDS:
+        return jsonify({'error': f"kind must be one of: {', '.join(sorted(API_KINDS))}"}), 400
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'payload must be an object'}), 400
+    if kind == 'youtube_asr' and not payload.get('videoId'):
+        return jsonify({'error': 'payload.videoId is required'}), 400
+
+    job = jobs.submit(kind, payload, client_id=client_id())
+    return jsonify({'message': 'Job queued', 'job': job, **jobs.links(job['id'])}), 202
+
+@jobs_bp.route('', methods=['GET'])
+def list_jobs():
+    # Only the caller's own jobs; other clients' job ids are never listed
+    status = request.args.get('status')
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    caller = client_id()
+    return jsonify({'jobs': jobs.list_jobs(caller, status, limit), 'counts': jobs.counts(caller), 'pool': jobs.pool_stats()}), 200
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    # Status, progress and (once finished) the result
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'job': job, **jobs.links(job_id)}), 200
+
+@jobs_bp.route('/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    # Progress and partial results as they are produced. Resume with ?after=<seq>
+    # or the Last-Event-ID header; ?stream=0 returns the events so far as JSON.
+    if jobs.get(job_id, include_result=False) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    after = request.args.get('after', type=int) or request.headers.get('Last-Event-ID', 0, type=int)
+
+    if request.args.get('stream', '1') == '0':
+        return jsonify({'events': jobs.events(job_id, after)}), 200
+
+    def generate():
+        last = after
+        last_sent = time.monotonic()
+        while True:
+            batch = jobs.events(job_id, last)
+            for event in batch:
+                last = event['seq']
+                if event['type'] == 'status' and event['data']['status'] in jobs.FINISHED:
+                    job = jobs.get(job_id)
+                    event['data']['result'] = job['result'] if job else None
+                    yield f"id: {last}\ndata: {json.dumps(event)}\n\n"
+                    yield 'data: [DONE]\n\n'
+                    return
+                yield f"id: {last}\ndata: {json.dumps(event)}\n\n"
+            if batch:
+                last_sent = time.monotonic()
+            elif jobs.get(job_id, include_result=False) is None:
+                # Pruned while we were watching it
+                return
+            elif time.monotonic() - last_sent > _KEEPALIVE_SECONDS:
+                yield ': keepalive\n\n'
+                last_sent = time.monotonic()
+            time.sleep(Config.JOBS_POLL_INTERVAL)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
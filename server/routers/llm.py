@@ -1,29 +1,93 @@
-from flask import Blueprint, jsonify, request
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from config import Config
+from services.llm_providers import huggingface
+from services.llm_providers.open_model_llama_cpp import generate_llama_cpp_response, known_model
+from services.singleflight import llm_flight, normalize_text, request_key
 
 llm_bp = Blueprint('llm', __name__)
 
+# Tasks accepted by /batch ("extract-points" style names are accepted too)
+BATCH_TASKS = {'summarize', 'extract_points', 'explain_code', 'improve_text', 'chat', 'detect_language'}
+
+# Shared pool so a batch's upstream calls run concurrently, sized so that
+# concurrent batches admitted by the scheduler do not queue behind each other
+_batch_pool = ThreadPoolExecutor(
+    max_workers=Config.LLM_BATCH_WORKERS or max(1, Config.SCHEDULER_SLOTS) * len(BATCH_TASKS),
+    thread_name_prefix='llm-batch')
+
+def detect_text_language(text):
+    # langdetect is optional and imported lazily; fall back to English without it
+    try:
+        from langdetect import detect
+    except ImportError:
+        return 'en'
+    try:
+        return detect(text)
+    except Exception:
+        # Raised for empty or undetectable text
+        return 'en'
+
 @llm_bp.route('/chat', methods=['POST'])
 def chat():
     # Placeholder for LLM chat logic
     data = request.json
     messages = data.get('messages') if data else None
-    model = data.get('model', 'default') if data else 'default'
+    model = (data.get('model') if data else None) or 'default'
     stream = data.get('stream', False) if data else False
-    return jsonify({'message': f'Chat with {model} received', 'response': 'This is a dummy chat response.'}), 200
+    conversation_id = data.get('conversation_id') if data else None
+    if not isinstance(model, str):
+        return jsonify({'error': 'model must be a string'}), 400
+    if messages is not None and not (isinstance(messages, list) and all(
+            isinstance(m, dict) and isinstance(m.get('role'), str) and isinstance(m.get('content'), str)
+            for m in messages)):
+        return jsonify({'error': 'messages must be a list of {role, content} objects with string values'}), 400
+    if conversation_id is not None and not isinstance(conversation_id, str):
+        return jsonify({'error': 'conversation_id must be a string'}), 400
+    if model == 'llama_cpp' or model.startswith('llama_cpp:'):
+        # Local model, selected by configured name only; conversation_id lets
+        # the KV cache be reused across turns
+        if not messages:
+            return jsonify({'error': 'messages is required for llama.cpp models'}), 400
+        local_model = model.partition(':')[2] or 'default'
+        if not known_model(local_model):
+            return jsonify({'error': f"Unknown llama.cpp model '{local_model}'. Available: {', '.join(sorted(Config.LLAMA_CPP_MODELS)) or 'default'}"}), 400
+        response = generate_llama_cpp_response(
+            messages, model=local_model,
+            session_id=conversation_id
+        )
+    else:
+        response = 'This is a dummy chat response.'
+    return jsonify({'message': f'Chat with {model} received', 'response': response}), 200
 
 @llm_bp.route('/summarize', methods=['POST'])
 def summarize():
     # Placeholder for LLM summarize logic
     data = request.json
     text = data.get('text') if data else None
-    return jsonify({'message': 'Summarize request received', 'summary': 'This is a dummy summary.'}), 200
+    model = data.get('model', 'default') if data else 'default'
+    if text is not None and not isinstance(text, str):
+        return jsonify({'error': 'text must be a string'}), 400
+
+    def run_summary():
+        return 'This is a dummy summary.'
+
+    # Concurrent requests for the same text and model share one upstream call
+    summary = llm_flight.do(request_key('summarize', model, normalize_text(text)), run_summary)
+    return jsonify({'message': 'Summarize request received', 'summary': summary}), 200
 
 @llm_bp.route('/detect-language', methods=['POST'])
 def detect_language():
     # Placeholder for language detection logic
     data = request.json
     text = data.get('text') if data else None
-    return jsonify({'message': 'Language detection request received', 'language': 'en'}), 200
+    if text is not None and not isinstance(text, str):
+        return jsonify({'error': 'text must be a string'}), 400
+    language = detect_text_language(normalize_text(text))
+    return jsonify({'message': 'Language detection request received', 'language': language}), 200
 
 @llm_bp.route('/explain-code', methods=['POST'])
 def explain_code():
@@ -66,3 +130,56 @@ def improve_text():
     response += "4. Eliminate redundancy"
     
     return jsonify({'message': 'Text improvement request received', 'improved_text': response}), 200
+
+def _run_batch_task(task, text, normalized):
+    if task == 'detect_language':
+        return True, detect_text_language(normalized)
+    return huggingface.run_task(task, text, normalized)
+
+@llm_bp.route('/batch', methods=['POST'])
+def batch():
+    # Run several tasks on the same text in one round trip
+    data = request.json
+    text = data.get('text') if data else None
+    tasks = data.get('tasks') if data else None
+    stream = data.get('stream', True) if data else True
+
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+    if not isinstance(text, str):
+        return jsonify({'error': 'text must be a string'}), 400
+    if not tasks or not isinstance(tasks, list):
+        return jsonify({'error': 'tasks must be a non-empty list'}), 400
+
+    tasks = list(dict.fromkeys(str(task).replace('-', '_') for task in tasks))
+    unknown = [task for task in tasks if task not in BATCH_TASKS]
+    if unknown:
+        return jsonify({'error': f"Unknown task(s): {', '.join(unknown)}. Supported: {', '.join(sorted(BATCH_TASKS))}"}), 400
+
+    # Normalize the text once and share it (and the cache/coalescing key) across tasks
+    normalized = normalize_text(text)
+    futures = {_batch_pool.submit(_run_batch_task, task, text, normalized): task for task in tasks}
+
+    def results():
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                ok, output = future.result()
+            except Exception as e:
+                ok, output = False, f'Error: {str(e)}'
+            yield {'task': task, 'ok': ok, 'result': output}
+
+    if not stream:
+        return jsonify({
+            'message': 'Batch request processed',
+            'results': {item['task']: item for item in results()}
+        }), 200
+
+    def generate():
+        # Each task is sent as soon as it finishes
+        for item in results():
+            yield f'data: {json.dumps(item)}\n\n'
+        yield 'data: [DONE]\n\n'
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response
+
+from services import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+def prometheus_metrics():
+    # Prometheus scrape endpoint
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
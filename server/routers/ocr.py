@@ -2,9 +2,33 @@ import os
 import tempfile
 import base64
 from flask import Blueprint, jsonify, request
+from services.singleflight import ocr_flight, request_key
 
 ocr_bp = Blueprint('ocr', __name__)
 
+def run_ocr(image_data, source):
+    # Save image temporarily and run OCR on it; returns (text, blocks)
+    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+        tmp_file.write(image_data)
+        tmp_path = tmp_file.name
+
+    # Process the image with OCR (in a real implementation, this would use Tesseract or PaddleOCR)
+    # For now, we'll simulate the OCR processing
+    try:
+        # Simulate OCR processing
+        # Not timed as an upstream stage until a real OCR engine is called here
+        text = f"This is sample text extracted from the {source} using OCR. In a complete implementation, this would contain the actual text content of the {source}."
+        blocks = []  # In a real implementation, this would contain text blocks with positioning info
+        return text, blocks
+    finally:
+        # Clean up temporary file
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def coalesced_ocr(image_data, source):
+    # Concurrent requests for the same image share one OCR run
+    return ocr_flight.do(request_key('ocr', source, image_data), lambda: run_ocr(image_data, source))
+
 @ocr_bp.route('/image', methods=['POST'])
 def ocr_image():
     # Handle OCR image processing
@@ -23,31 +47,19 @@ def ocr_image():
         if not (file.filename and file.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))):
             return jsonify({'error': 'File must be an image'}), 400
             
-        # Save file temporarily
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            file.save(tmp_file.name)
-            tmp_path = tmp_file.name
-            
-        # Process the image with OCR (in a real implementation, this would use Tesseract or PaddleOCR)
-        # For now, we'll simulate the OCR processing
+        # Read the upload so identical images can be coalesced
+        image_data = file.read()
+
         try:
-            # Simulate OCR processing
-            text = "This is sample text extracted from the image using OCR. In a complete implementation, this would contain the actual text content of the image."
-            blocks = []  # In a real implementation, this would contain text blocks with positioning info
-            
-            # Clean up temporary file
-            os.unlink(tmp_path)
-            
+            text, blocks = coalesced_ocr(image_data, 'image')
+
             return jsonify({
                 'message': 'Image processed successfully',
                 'text': text,
                 'blocks': blocks
             }), 200
-            
+
         except Exception as e:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
             return jsonify({'error': f'Failed to process image: {str(e)}'}), 500
             
     except Exception as e:
@@ -69,31 +81,16 @@ def ocr_screenshot():
         except Exception as e:
             return jsonify({'error': 'Invalid base64 image data'}), 400
             
-        # Save image temporarily
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            tmp_file.write(image_data)
-            tmp_path = tmp_file.name
-            
-        # Process the screenshot with OCR (in a real implementation, this would use Tesseract or PaddleOCR)
-        # For now, we'll simulate the OCR processing
         try:
-            # Simulate OCR processing
-            text = "This is sample text extracted from the screenshot using OCR. In a complete implementation, this would contain the actual text content of the screenshot."
-            blocks = []  # In a real implementation, this would contain text blocks with positioning info
-            
-            # Clean up temporary file
-            os.unlink(tmp_path)
-            
+            text, blocks = coalesced_ocr(image_data, 'screenshot')
+
             return jsonify({
                 'message': 'Screenshot processed successfully',
                 'text': text,
                 'blocks': blocks
             }), 200
-            
+
         except Exception as e:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
             return jsonify({'error': f'Failed to process screenshot: {str(e)}'}), 500
             
     except Exception as e:
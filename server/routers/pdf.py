@@ -1,8 +1,9 @@
 import os
 import tempfile
 from flask import Blueprint, jsonify, request
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
+from services import jobs, metrics
+from services.scheduler import client_id
+from services.singleflight import pdf_flight, request_key
 
 pdf_bp = Blueprint('pdf', __name__)
 
@@ -24,17 +25,38 @@ def extract_pdf():
         if not (file.filename and file.filename.endswith('.pdf')):
             return jsonify({'error': 'File must be a PDF'}), 400
             
-        # Save file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            file.save(tmp_file.name)
-            tmp_path = tmp_file.name
-            
+        # Read the upload so concurrent requests for the same PDF can share one extraction
+        pdf_bytes = file.read()
+
+        # ?async=1 queues the extraction as a background job and returns its id right away
+        if jobs.async_requested(request.args):
+            job = jobs.submit('pdf_extract', {'filename': file.filename}, files={'upload.pdf': pdf_bytes},
+                              client_id=client_id())
+            return jsonify({'message': 'PDF extraction queued', 'job': job, **jobs.links(job['id'])}), 202
+
+        def run_extraction():
+            # Save file temporarily
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+                tmp_file.write(pdf_bytes)
+                tmp_path = tmp_file.name
+            try:
+                # Imported here so the server starts without paying for pdfminer
+                from pdfminer.high_level import extract_text
+                from pdfminer.layout import LAParams
+
+                # Extract text from PDF with default layout analysis parameters
+                laparams = LAParams()
+                with metrics.timed('pdf'):
+                    return extract_text(tmp_path, laparams=laparams)
+            finally:
+                # Clean up temporary file
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
         # Process the PDF using pdfminer
         try:
-            # Extract text from PDF with default layout analysis parameters
-            laparams = LAParams()
-            text = extract_text(tmp_path, laparams=laparams)
-            
+            text = pdf_flight.do(request_key('pdf', pdf_bytes), run_extraction)
+
             # Split text into pages (this is a simplification - pdfminer doesn't directly provide per-page extraction)
             # For now, we'll treat the entire text as one page
             pages = []
@@ -43,21 +65,15 @@ def extract_pdf():
                 'text': text.strip(),
                 'tables': []
             })
-            
-            # Clean up temporary file
-            os.unlink(tmp_path)
-            
+
             return jsonify({
                 'message': 'PDF processed successfully',
                 'pages': pages
             }), 200
-            
+
         except Exception as e:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
             return jsonify({'error': f'Failed to process PDF: {str(e)}'}), 500
-            
+
     except Exception as e:
         return jsonify({'error': f'Failed to handle PDF upload: {str(e)}'}), 500
 
@@ -1,13 +1,28 @@
 from flask import Blueprint, jsonify, request
+from embeddings.sentence_transformers import get_embeddings
+from services.encoding import negotiate_vector_format, vectors_response
 
 rag_bp = Blueprint('rag', __name__)
 
 @rag_bp.route('/embed', methods=['POST'])
 def embed():
-    # Placeholder for embedding generation
+    # Generate embeddings; binary formats are available through content negotiation
     data = request.json
     texts = data.get('texts') if data else None
-    return jsonify({'message': 'Embed request received', 'embeddings': [[0.1, 0.2]]}), 200
+    model = data.get('model', 'all-MiniLM-L6-v2') if data else 'all-MiniLM-L6-v2'
+
+    if not texts or not isinstance(texts, list):
+        return jsonify({'error': 'texts must be a non-empty list'}), 400
+
+    fmt = negotiate_vector_format()
+    if fmt is None:
+        return jsonify({'error': 'Unsupported format. Use json, float32, float16 or msgpack'}), 406
+
+    embeddings = get_embeddings(texts, model=model)
+    response = vectors_response(embeddings, fmt, {'message': 'Embed request received', 'embeddings': embeddings}, model=model)
+    if response is None:
+        return jsonify({'error': f'Format {fmt} is not available on this server'}), 406
+    return response, 200
 
 @rag_bp.route('/upsert', methods=['POST'])
 def upsert():
@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, request
+
+from services import warmup
+
+warmup_bp = Blueprint('warmup', __name__)
+
+@warmup_bp.route('', methods=['GET'])
+def warmup_report():
+    # Startup time per subsystem and state of any model warmup
+    return jsonify({
+        'startup': warmup.startup_timings(),
+        'models': warmup.warmup_status(),
+        'available': sorted(warmup.WARMERS),
+    }), 200
+
+@warmup_bp.route('', methods=['POST'])
+def start_warmup():
+    # Preload selected models in the background
+    data = request.json
+    models = data.get('models') if data else None
+    if not models or not isinstance(models, list):
+        return jsonify({'error': 'models must be a non-empty list'}), 400
+    if not all(isinstance(name, str) for name in models):
+        return jsonify({'error': 'models must be a list of strings'}), 400
+    try:
+        queued = warmup.start_warmup(models)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'message': 'Warmup started', 'queued': queued, 'models': warmup.warmup_status()}), 202
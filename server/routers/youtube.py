@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
 
+from services import jobs
+from services.scheduler import client_id
+
 youtube_bp = Blueprint('youtube', __name__)
 
 @youtube_bp.route('/transcript', methods=['POST'])
@@ -14,6 +17,12 @@ def perform_asr():
     # Placeholder for YouTube ASR
     data = request.json
     video_id = data.get('videoId')
+    # ?async=1 runs the transcription as a background job and returns its id right away
+    if jobs.async_requested(request.args):
+        if not video_id:
+            return jsonify({'error': 'videoId is required'}), 400
+        job = jobs.submit('youtube_asr', {'videoId': video_id}, client_id=client_id())
+        return jsonify({'message': 'YouTube ASR queued', 'job': job, **jobs.links(job['id'])}), 202
     return jsonify({'message': 'YouTube ASR request received', 'transcript': [{'start': 0, 'dur': 5, 'text': 'dummy ASR transcript'}], 'lang': 'en'}), 200
 
 @youtube_bp.route('/summarize', methods=['POST'])
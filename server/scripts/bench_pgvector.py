@@ -0,0 +1,105 @@
+# pgvector store benchmark, runnable against a local Postgres:
+#
+#   docker run -d -p 5432:5432 -e POSTGRES_USER=user -e POSTGRES_PASSWORD=password \
+#       -e POSTGRES_DB=mydatabase ankane/pgvector
+#   python scripts/init_db.py
+#   python scripts/bench_pgvector.py --docs 20000 --queries 200
+#
+# Compares row-by-row INSERTs with the binary COPY upsert, and one query per
+# round trip with batched queries, for the configured index method.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from rag import store_pgvector as store
+
+
+def random_docs(count, dim, rng, prefix):
+    return [{
+        'id': f'{prefix}-{i}',
+        'text': f'Benchmark document {i}',
+        'embedding': [rng.uniform(-1, 1) for _ in range(dim)],
+        'metadata': {'i': i},
+    } for i in range(count)]
+
+
+def insert_row_by_row(docs, namespace):
+    with store.connection() as conn, conn.cursor() as cur:
+        for doc in docs:
+            cur.execute(
+                'INSERT INTO documents (namespace, id, content, embedding, metadata) '
+                'VALUES (%s, %s, %s, %s::vector, %s::jsonb) '
+                'ON CONFLICT (namespace, id) DO UPDATE SET content = EXCLUDED.content, '
+                'embedding = EXCLUDED.embedding, metadata = EXCLUDED.metadata',
+                (namespace, doc['id'], doc['text'], store.vector_literal(doc['embedding']), '{}'),
+            )
+
+
+def clear_namespace(namespace):
+    with store.connection() as conn, conn.cursor() as cur:
+        cur.execute('DELETE FROM documents WHERE namespace = %s', (namespace,))
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<44}{elapsed:>10.3f}s')
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pgvector store')
+    parser.add_argument('--docs', type=int, default=10000)
+    parser.add_argument('--row-docs', type=int, default=2000, help='Documents for the row-by-row baseline')
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=50, help='Query vectors per round trip')
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--namespace', default='bench')
+    parser.add_argument('--method', choices=('hnsw', 'ivfflat'), default=Config.PGVECTOR_INDEX_METHOD)
+    parser.add_argument('--ef-search', type=int, default=None)
+    parser.add_argument('--probes', type=int, default=None)
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark namespace afterwards')
+    args = parser.parse_args()
+
+    Config.PGVECTOR_INDEX_METHOD = args.method
+    rng = random.Random(0)
+    print(f'Database: {Config.DATABASE_URL}  index: {args.method}  dim: {args.dim}\n')
+
+    try:
+        clear_namespace(args.namespace)
+        store.drop_namespace_index(args.namespace, args.method)
+        row_docs = random_docs(args.row_docs, args.dim, rng, 'row')
+        row_time, _ = timed(f'row-by-row INSERT ({args.row_docs} docs)', lambda: insert_row_by_row(row_docs, args.namespace))
+        clear_namespace(args.namespace)
+
+        docs = random_docs(args.docs, args.dim, rng, 'copy')
+        copy_time, _ = timed(f'binary COPY upsert ({args.docs} docs)', lambda: store.upsert_documents_pgvector(docs, args.namespace, create_index=False))
+        print(f"{'  docs/s row-by-row vs COPY':<44}{args.row_docs / row_time:>10.0f} vs {args.docs / copy_time:.0f}")
+
+        timed(f'{args.method} index build (after load)', lambda: store.finish_namespace_load(args.namespace, args.method))
+
+        queries = [[rng.uniform(-1, 1) for _ in range(args.dim)] for _ in range(args.queries)]
+        params = {'ef_search': args.ef_search, 'probes': args.probes}
+        single_time, _ = timed(f'{args.queries} queries, one per round trip', lambda: [
+            store.query_documents_pgvector(q, args.top_k, args.namespace, **params) for q in queries])
+        batch_time, _ = timed(f'{args.queries} queries, {args.batch_size} per round trip', lambda: [
+            store.query_documents_pgvector_batch(queries[i:i + args.batch_size], args.top_k, args.namespace, **params)
+            for i in range(0, len(queries), args.batch_size)])
+        print(f"{'  queries/s single vs batched':<44}{args.queries / single_time:>10.0f} vs {args.queries / batch_time:.0f}")
+    finally:
+        if not args.keep:
+            clear_namespace(args.namespace)
+            store.drop_namespace_index(args.namespace, args.method)
+        store.close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# Serialization benchmark for embedding and large text responses.
+#
+# Compares encode/decode time and bytes on the wire for the /api/rag/embed
+# formats (JSON, float32, float16, msgpack), and gzip/brotli for large
+# text responses such as /api/pdf/extract:
+#
+#   python scripts/bench_serialization.py --vectors 256 --dim 384 --text-kb 512
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.encoding import pack_vectors, unpack_vectors
+
+
+def timeit(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def vector_formats(vectors):
+    shape = (len(vectors), len(vectors[0]))
+    formats = {
+        'json': (lambda: json.dumps({'embeddings': vectors}).encode('utf-8'),
+                 lambda data: json.loads(data)['embeddings']),
+        'float32': (lambda: pack_vectors(vectors, 'float32')[0],
+                    lambda data: unpack_vectors(data, shape, 'float32')),
+        'float16': (lambda: pack_vectors(vectors, 'float16')[0],
+                    lambda data: unpack_vectors(data, shape, 'float16')),
+    }
+    try:
+        import msgpack
+        formats['msgpack'] = (
+            lambda: msgpack.packb({'shape': list(shape), 'data': pack_vectors(vectors, 'float32')[0]}),
+            lambda data: unpack_vectors(msgpack.unpackb(data)['data'], shape, 'float32'),
+        )
+    except ImportError:
+        print('msgpack not installed; skipping msgpack format')
+    return formats
+
+
+def text_encodings():
+    encodings = {
+        'identity': (lambda data: data, lambda data: data),
+        'gzip-1': (lambda data: gzip.compress(data, 1), gzip.decompress),
+        'gzip-5': (lambda data: gzip.compress(data, 5), gzip.decompress),
+        'gzip-9': (lambda data: gzip.compress(data, 9), gzip.decompress),
+    }
+    try:
+        import brotli
+        encodings['br-4'] = (lambda data: brotli.compress(data, quality=4), brotli.decompress)
+        encodings['br-11'] = (lambda data: brotli.compress(data, quality=11), brotli.decompress)
+    except ImportError:
+        print('brotli not installed; skipping brotli encodings')
+    return encodings
+
+
+def synthetic_text(size_kb):
+    words = ('the model extracts text from each page of the document and returns it as '
+             'plain paragraphs with tables figures and references 2024 revenue growth of 12.5%').split()
+    rng = random.Random(0)
+    out = []
+    size = 0
+    while size < size_kb * 1024:
+        word = rng.choice(words)
+        out.append(word)
+        size += len(word) + 1
+    return ' '.join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response serialization formats')
+    parser.add_argument('--vectors', type=int, default=256)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--text-kb', type=int, default=512, help='Size of the synthetic PDF text')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vectors = [[rng.uniform(-1, 1) for _ in range(args.dim)] for _ in range(args.vectors)]
+
+    formats = vector_formats(vectors)
+    encodings = text_encodings()
+
+    print(f'Embeddings: {args.vectors} x {args.dim}')
+    print(f"{'format':<10}{'bytes':>12}{'gzip bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+    for name, (encode, decode) in formats.items():
+        encode_time, data = timeit(encode, args.repeat)
+        decode_time, _ = timeit(lambda: decode(data), args.repeat)
+        print(f'{name:<10}{len(data):>12}{len(gzip.compress(data, 5)):>12}'
+              f'{encode_time * 1000:>12.2f}{decode_time * 1000:>12.2f}')
+
+    body = json.dumps({'pages': [{'page': 1, 'text': synthetic_text(args.text_kb), 'tables': []}]}).encode('utf-8')
+    print(f'\nPDF text response: {len(body)} bytes of JSON')
+    print(f"{'encoding':<10}{'bytes':>12}{'ratio':>8}{'compress ms':>14}{'decompress ms':>16}")
+    for name, (encode, decode) in encodings.items():
+        encode_time, data = timeit(lambda: encode(body), args.repeat)
+        decode_time, _ = timeit(lambda: decode(data), args.repeat)
+        print(f'{name:<10}{len(data):>12}{len(body) / len(data):>8.1f}'
+              f'{encode_time * 1000:>14.2f}{decode_time * 1000:>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+# Load-test / benchmark harness for the AI Assistant server.
+#
+# Replays a JSONL workload against the server with a fixed number of
+# concurrent clients and reports throughput and p50/p95/p99 latency per
+# endpoint. Reports are written as JSON so runs can be diffed:
+#
+#   python scripts/benchmark.py --spawn-server --upstream-latency-ms 300 \
+#       --concurrency 16 --requests 2000 --output bench/baseline.json
+#   python scripts/benchmark.py --spawn-server --output bench/new.json \
+#       --compare bench/baseline.json
+#
+# Each workload line is a JSON object:
+#   {"name": "summarize", "method": "POST", "path": "/api/llm/summarize", "json": {...}}
+# Only "path" is required; "name" defaults to "METHOD path" and "weight"
+# (default 1) repeats the entry in the replay cycle.
+#
+# All benchmark clients come from one address and so share one rate-limit
+# bucket. --spawn-server therefore runs the app with admission control and the
+# Hugging Face result cache off, so every request reaches the server and
+# every /process call goes upstream. Pass --scheduler / --cache to include
+# them; the settings are recorded in the report. Against --base-url, start
+# the server with SCHEDULER_ENABLED=0 and HF_CACHE_SIZE=0 for the same effect.
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from scripts.fake_upstream import start_fake_upstream
+
+DEFAULT_WORKLOAD = os.path.join(SERVER_DIR, 'scripts', 'workloads', 'default.jsonl')
+
+
+def load_workload(path):
+    """Read a JSONL workload, expanding entries by their weight."""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line)
+            if 'path' not in entry:
+                raise ValueError(f"{path}:{line_no}: workload entry is missing 'path'")
+            entry.setdefault('method', 'POST' if 'json' in entry else 'GET')
+            entry.setdefault('name', f"{entry['method']} {entry['path']}")
+            entries.extend([entry] * int(entry.get('weight', 1)))
+    if not entries:
+        raise ValueError(f'{path}: workload is empty')
+    return entries
+
+
+def spawn_server(upstream_url, scheduler=False, cache=False):
+    """Run the Flask app in-process on an ephemeral port, pointed at the fake upstream."""
+    os.environ['HF_API_BASE'] = upstream_url
+    os.environ.setdefault('HF_TOKEN', 'fake-benchmark-token')
+    # Config reads these at import time, so they must be set before importing the app
+    os.environ['SCHEDULER_ENABLED'] = '1' if scheduler else '0'
+    if not cache:
+        os.environ['HF_CACHE_SIZE'] = '0'
+    # The workload does not use background jobs; don't spawn worker processes
+    os.environ.setdefault('JOBS_WORKERS', '0')
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name='bench-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_benchmark(base_url, workload, concurrency, total_requests, timeout, warmup):
+    session_local = threading.local()
+
+    def send(entry):
+        session = getattr(session_local, 'session', None)
+        if session is None:
+            session = session_local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = session.request(entry['method'], base_url + entry['path'],
+                                       json=entry.get('json'), timeout=timeout)
+            ok = response.status_code < 400
+            # Read the full body so streamed responses are timed to completion
+            _ = response.content
+        except requests.RequestException:
+            ok = False
+        return entry['name'], time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if warmup:
+            list(pool.map(send, itertools.islice(itertools.cycle(workload), warmup)))
+
+        started = time.perf_counter()
+        samples = list(pool.map(send, itertools.islice(itertools.cycle(workload), total_requests)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(samples, elapsed, concurrency)
+
+
+def summarize(samples, elapsed, concurrency):
+    by_name = {}
+    for name, latency, ok in samples:
+        by_name.setdefault(name, []).append((latency, ok))
+
+    endpoints = {}
+    for name in sorted(by_name):
+        latencies = sorted(latency for latency, _ in by_name[name])
+        errors = sum(1 for _, ok in by_name[name] if not ok)
+        endpoints[name] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            'mean_ms': round(1000 * sum(latencies) / len(latencies), 2),
+            'p50_ms': round(1000 * percentile(latencies, 50), 2),
+            'p95_ms': round(1000 * percentile(latencies, 95), 2),
+            'p99_ms': round(1000 * percentile(latencies, 99), 2),
+        }
+
+    return {
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'requests': len(samples),
+        'errors': sum(e['errors'] for e in endpoints.values()),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'endpoints': endpoints,
+    }
+
+
+def print_report(report, baseline=None):
+    columns = ('requests', 'errors', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+    print(f"{'endpoint':<40}" + ''.join(f'{c:>16}' for c in columns))
+    for name, stats in report['endpoints'].items():
+        row = f'{name:<40}'
+        previous = (baseline or {}).get('endpoints', {}).get(name)
+        for column in columns:
+            cell = f'{stats[column]}'
+            if previous and previous.get(column):
+                delta = 100.0 * (stats[column] - previous[column]) / previous[column]
+                cell += f' ({delta:+.0f}%)'
+            row += f'{cell:>16}'
+        print(row)
+    print(f"\nTotal: {report['requests']} requests, {report['errors']} errors, "
+          f"{report['throughput_rps']} req/s over {report['duration_s']}s "
+          f"at concurrency {report['concurrency']}")
+    if baseline and baseline.get('server_settings') != report.get('server_settings'):
+        print(f"Warning: server settings differ from the baseline "
+              f"({baseline.get('server_settings')} vs {report.get('server_settings')})")
+
+
+def find_regressions(report, baseline, threshold_pct):
+    """Return endpoints whose p95 latency grew or throughput dropped beyond the threshold."""
+    regressions = []
+    for name, stats in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        if previous['p95_ms'] and stats['p95_ms'] > previous['p95_ms'] * (1 + threshold_pct / 100.0):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {stats['p95_ms']}ms")
+        if previous['throughput_rps'] and stats['throughput_rps'] < previous['throughput_rps'] * (1 - threshold_pct / 100.0):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {stats['throughput_rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the AI Assistant server')
+    parser.add_argument('--workload', default=DEFAULT_WORKLOAD, help='JSONL workload file to replay')
+    parser.add_argument('--base-url', default='http://localhost:5000', help='Server to benchmark')
+    parser.add_argument('--spawn-server', action='store_true',
+                        help='Run the app in-process against a local fake upstream instead of --base-url')
+    parser.add_argument('--scheduler', action='store_true',
+                        help='With --spawn-server, keep admission control and rate limits on')
+    parser.add_argument('--cache', action='store_true',
+                        help='With --spawn-server, keep the Hugging Face result cache on')
+    parser.add_argument('--upstream-latency-ms', type=float, default=200.0)
+    parser.add_argument('--upstream-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=500, help='Total requests to send')
+    parser.add_argument('--warmup', type=int, default=0, help='Untimed requests sent before measuring')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--output', help='Write the JSON report here')
+    parser.add_argument('--compare', help='Baseline JSON report to diff against')
+    parser.add_argument('--fail-threshold', type=float, default=None,
+                        help='Exit non-zero if p95/throughput regress by more than this percent vs --compare')
+    args = parser.parse_args()
+
+    workload = load_workload(args.workload)
+    base_url = args.base_url.rstrip('/')
+    upstream = None
+    server = None
+    if args.spawn_server:
+        upstream = start_fake_upstream(latency_ms=args.upstream_latency_ms,
+                                       jitter_ms=args.upstream_jitter_ms,
+                                       error_rate=args.upstream_error_rate)
+        server, base_url = spawn_server(f'http://127.0.0.1:{upstream.server_port}',
+                                        scheduler=args.scheduler, cache=args.cache)
+        from config import Config
+        settings = {'scheduler': Config.SCHEDULER_ENABLED, 'hf_cache_size': Config.HF_CACHE_SIZE}
+    else:
+        settings = None  # unknown for an external server
+
+    print(f'Benchmarking {base_url} with {args.workload} '
+          f'({args.requests} requests, concurrency {args.concurrency})')
+    if settings:
+        print(f"Scheduler {'on' if settings['scheduler'] else 'off'}, "
+              f"HF cache size {settings['hf_cache_size']}")
+    print()
+    try:
+        report = run_benchmark(base_url, workload, args.concurrency, args.requests, args.timeout, args.warmup)
+    finally:
+        if server:
+            server.shutdown()
+        if upstream:
+            upstream.shutdown()
+
+    report['server_settings'] = settings
+    if upstream:
+        report['upstream'] = {
+            'latency_ms': args.upstream_latency_ms,
+            'jitter_ms': args.upstream_jitter_ms,
+            'error_rate': args.upstream_error_rate,
+            'calls': upstream.stats['requests'],
+        }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\nReport written to {args.output}')
+
+    if baseline and args.fail_threshold is not None:
+        regressions = find_regressions(report, baseline, args.fail_threshold)
+        if regressions:
+            print('\nRegressions:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
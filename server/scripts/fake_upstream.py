@@ -0,0 +1,122 @@
+# Local stand-in for the Hugging Face router and OpenRouter APIs.
+#
+# Used by scripts/benchmark.py so load tests measure the server rather than a
+# remote provider. Latency is tunable per run:
+#
+#   python scripts/fake_upstream.py --port 8910 --latency-ms 300 --jitter-ms 50
+#   HF_API_BASE=http://127.0.0.1:8910 HF_TOKEN=fake python run_server.py
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            return json.loads(raw or b'{}')
+        except ValueError:
+            return {}
+
+    def do_POST(self):
+        config = self.server.config
+        data = self._read_json()
+
+        delay = max(0.0, random.gauss(config['latency_ms'], config['jitter_ms'])) / 1000.0
+        time.sleep(delay)
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+
+        if random.random() < config['error_rate']:
+            return self._send_json(503, {'error': 'Fake upstream error'})
+
+        if self.path.startswith('/models/'):
+            # Hugging Face inference router
+            model = self.path[len('/models/'):]
+            prompt = str(data.get('inputs', ''))
+            return self._send_json(200, [{'generated_text': f'[{model}] {prompt[:config["echo_chars"]]}'}])
+
+        if self.path.rstrip('/') in ('/api/v1/chat/completions', '/v1/chat/completions'):
+            # OpenRouter (OpenAI-compatible) chat completions
+            messages = data.get('messages') or [{}]
+            content = str(messages[-1].get('content', ''))
+            return self._send_json(200, {
+                'id': 'fake-completion',
+                'model': data.get('model', 'fake'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content[:config['echo_chars']]},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {'prompt_tokens': len(content.split()), 'completion_tokens': 0},
+            })
+
+        return self._send_json(404, {'error': f'Unknown path {self.path}'})
+
+
+class _FakeUpstreamServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 makes bursts of concurrent connections
+    # wait for SYN retransmits (~1s), which would show up as upstream latency
+    request_queue_size = 256
+
+
+def start_fake_upstream(host='127.0.0.1', port=0, latency_ms=200.0, jitter_ms=0.0, error_rate=0.0, echo_chars=200):
+    """Start the fake upstream in a daemon thread and return the server.
+
+    ``server.server_port`` holds the bound port when ``port=0``.
+    """
+    server = _FakeUpstreamServer((host, port), FakeUpstreamHandler)
+    server.daemon_threads = True
+    server.config = {
+        'latency_ms': latency_ms,
+        'jitter_ms': jitter_ms,
+        'error_rate': error_rate,
+        'echo_chars': echo_chars,
+    }
+    server.stats = {'requests': 0}
+    server.stats_lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, name='fake-upstream', daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Hugging Face / OpenRouter upstream')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8910)
+    parser.add_argument('--latency-ms', type=float, default=200.0, help='Mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Std deviation of latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args()
+
+    server = start_fake_upstream(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Fake upstream listening on http://{args.host}:{server.server_port} "
+          f"(latency {args.latency_ms}ms ± {args.jitter_ms}ms, error rate {args.error_rate})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,73 @@
-# Placeholder for corpus indexing script
+# Index a directory of .txt/.md files into the pgvector store.
+#
+#   python scripts/index_corpus.py ./data/my_documents --namespace docs
+#   python scripts/index_corpus.py ./data/my_documents --async          # queue as a background job
+#   python scripts/index_corpus.py ./data/my_documents --async --wait   # ...and follow its progress
 
+import argparse
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services import jobs
+
+
+def index_corpus(corpus_path, namespace='default', batch_size=64):
+    from rag.indexer import index_corpus as run_index
 
-def index_corpus(corpus_path):
-    # Dummy function to simulate corpus indexing
     print(f"Indexing corpus from: {corpus_path}")
-    # In a real scenario, this would read documents, chunk them, generate embeddings, and upsert to the RAG store.
-    print("Corpus indexing complete.")
+    summary = run_index(corpus_path, namespace, batch_size,
+                        on_progress=lambda fraction, message: print(f'{fraction:6.1%}  {message}'))
+    print(f"Corpus indexing complete: {summary['chunks']} chunks from {summary['files']} files")
+    return summary
+
+
+def follow(job_id):
+    """Print a job's events until it finishes; returns True on success."""
+    after = 0
+    while True:
+        for event in jobs.events(job_id, after):
+            after = event['seq']
+            data = event['data']
+            if event['type'] == 'progress':
+                print(f"{data['progress']:6.1%}  {data['message'] or ''}")
+            elif event['type'] == 'status':
+                detail = data.get('reason') or data.get('error')
+                print(f"[{data['status']}] {detail}" if detail else f"[{data['status']}]")
+                if data['status'] in jobs.FINISHED:
+                    job = jobs.get(job_id)
+                    if job['status'] == jobs.SUCCEEDED:
+                        print(f"Result: {job['result']}")
+                    return job['status'] == jobs.SUCCEEDED
+        time.sleep(Config.JOBS_POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index a corpus into the pgvector store.')
+    parser.add_argument('corpus_path')
+    parser.add_argument('--namespace', default='default')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--async', dest='run_async', action='store_true',
+                        help='Queue as a background job for the job workers instead of indexing here')
+    parser.add_argument('--wait', action='store_true', help='With --async, follow the job until it finishes')
+    args = parser.parse_args()
+
+    if not args.run_async:
+        index_corpus(args.corpus_path, args.namespace, args.batch_size)
+        return
+
+    job = jobs.submit('index_corpus', {
+        'path': os.path.abspath(args.corpus_path),
+        'namespace': args.namespace,
+        'batch_size': args.batch_size,
+    })
+    print(f"Queued job {job['id']} (status: /api/jobs/{job['id']})")
+    if args.wait and not follow(job['id']):
+        sys.exit(1)
+
 
 if __name__ == '__main__':
-    # Example usage:
-    # index_corpus('./data/my_documents')
-    print("Run with a corpus path argument.")
+    main()
@@ -0,0 +1,55 @@
+# Run background job workers outside the web server.
+#
+#   python scripts/job_worker.py --workers 4
+#
+# Workers share the SQLite queue at JOBS_DB_PATH, so any number of these can
+# run next to the server (start the server with JOBS_WORKERS=0 to leave all
+# jobs to them). Crashed workers are restarted and their jobs retried.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services import jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background job workers.')
+    parser.add_argument('--workers', type=int, default=max(Config.JOBS_WORKERS, 1), help='Worker processes')
+    parser.add_argument('--status', action='store_true', help='Print queue counts and exit')
+    # Used by jobs.WorkerPool: run a single worker loop in this process
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--parent-pid', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        try:
+            jobs.run_worker(parent_pid=args.parent_pid)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.status:
+        counts = jobs.counts()
+        for status in (jobs.QUEUED, jobs.RUNNING, jobs.SUCCEEDED, jobs.FAILED):
+            print(f'{status:<10} {counts.get(status, 0)}')
+        return
+
+    print(f'Starting {args.workers} job worker(s) on {Config.JOBS_DB_PATH}')
+    # Jobs left running by a previous, killed run are retried once their heartbeat expires
+    jobs.requeue_stale()
+    pool = jobs.WorkerPool(args.workers).start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print('Stopping workers')
+        pool.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Preload models on a running server, or time them locally.
+#
+#   python scripts/warmup.py --models pdf,embeddings            # ask the server to warm up
+#   python scripts/warmup.py --models pdf,embeddings --wait     # ...and poll until done
+#   python scripts/warmup.py --models pdf,tts --local           # load in this process and print timings
+#
+# The server can also warm up on its own at startup via WARMUP_MODELS=pdf,embeddings.
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import warmup
+
+
+def warm_local(models):
+    failed = False
+    for name in models:
+        status = warmup.warm_model(name)
+        line = f"{name:<12} {status['state']:<6} {status['seconds']:.3f}s"
+        if status['error']:
+            line += f"  ({status['error']})"
+            failed = True
+        print(line)
+    return not failed
+
+
+def warm_remote(base_url, models, wait, timeout):
+    response = requests.post(f'{base_url}/api/warmup', json={'models': models}, timeout=10)
+    if response.status_code != 202:
+        print(f"Warmup request failed ({response.status_code}): {response.text}")
+        return False
+    print(f"Queued: {', '.join(response.json()['queued']) or 'nothing (already loaded)'}")
+    if not wait:
+        return True
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        report = requests.get(f'{base_url}/api/warmup', timeout=10).json()
+        states = {name: report['models'].get(name, {}) for name in models}
+        if all(s.get('state') in ('ready', 'error') for s in states.values()):
+            for name, s in states.items():
+                print(f"{name:<12} {s['state']:<6} {s['seconds']}s" + (f"  ({s['error']})" if s['error'] else ''))
+            print(f"Startup timings: {report['startup']}")
+            return all(s['state'] == 'ready' for s in states.values())
+        time.sleep(0.5)
+    print('Timed out waiting for warmup')
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preload heavy models')
+    parser.add_argument('--models', required=True, help=f"Comma-separated: {','.join(sorted(warmup.WARMERS))}")
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--local', action='store_true', help='Load the models in this process and report timings')
+    parser.add_argument('--wait', action='store_true', help='Poll the server until warmup finishes')
+    parser.add_argument('--timeout', type=float, default=600.0)
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+    unknown = [m for m in models if m not in warmup.WARMERS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+
+    if args.local:
+        ok = warm_local(models)
+    else:
+        ok = warm_remote(args.base_url.rstrip('/'), models, args.wait, args.timeout)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
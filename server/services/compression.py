@@ -0,0 +1,71 @@
+# Response compression for large text payloads (e.g. /api/pdf/extract).
+#
+# Compresses buffered text/JSON responses above COMPRESS_MIN_SIZE with brotli
+# (when the optional brotli package is installed and the client accepts it)
+# or gzip. Binary vector buffers and streamed responses are left alone.
+
+import gzip
+
+from flask import request
+
+from config import Config
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+}
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def choose_encoding(accept_encodings):
+    if accept_encodings['br'] and _brotli() is not None:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return _brotli().compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL)
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def init_app(app):
+    """Install the compression hook (register after metrics so sizes are measured on the wire)."""
+    if Config.COMPRESS_MIN_SIZE <= 0:
+        return
+
+    @app.after_request
+    def _compress_response(response):
+        if (response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or not (200 <= response.status_code < 300)
+                or not _compressible(response)):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < Config.COMPRESS_MIN_SIZE:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,102 @@
+# Compact encodings for vector payloads.
+#
+# JSON float lists are several times larger than the data they carry and slow
+# to build. Clients that ask for it (via Accept or ?format=) receive the
+# embedding matrix as a raw little-endian float32/float16 buffer, or as
+# msgpack. The shape and dtype are sent in X-Embedding-* headers.
+
+import itertools
+import struct
+import sys
+from array import array
+
+from flask import Response, jsonify, request
+
+FLOAT32_MIMETYPE = 'application/x-float32'
+FLOAT16_MIMETYPE = 'application/x-float16'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# ?format= values and Accept mimetypes -> encoding
+FORMATS = {
+    'json': 'json',
+    'float32': 'float32',
+    'float16': 'float16',
+    'msgpack': 'msgpack',
+}
+MIMETYPES = {
+    'application/json': 'json',
+    FLOAT32_MIMETYPE: 'float32',
+    'application/octet-stream': 'float32',
+    FLOAT16_MIMETYPE: 'float16',
+    MSGPACK_MIMETYPE: 'msgpack',
+    'application/x-msgpack': 'msgpack',
+}
+
+
+def negotiate_vector_format():
+    """Pick the encoding from ?format= or the Accept header; JSON by default."""
+    explicit = request.args.get('format')
+    if explicit:
+        return FORMATS.get(explicit.lower())
+    # application/json is listed first so "*/*" keeps the JSON response
+    best = request.accept_mimetypes.best_match(list(MIMETYPES), default='application/json')
+    return MIMETYPES[best]
+
+
+def pack_vectors(vectors, dtype='float32'):
+    """Pack equal-length vectors into a little-endian float32/float16 buffer; returns (bytes, shape)."""
+    rows = len(vectors)
+    dim = len(vectors[0]) if rows else 0
+    if any(len(vector) != dim for vector in vectors):
+        raise ValueError('All vectors must have the same dimension')
+    flat = itertools.chain.from_iterable(vectors)
+    if dtype == 'float16':
+        return struct.pack(f'<{rows * dim}e', *flat), (rows, dim)
+    buffer = array('f', flat)
+    if sys.byteorder != 'little':
+        buffer.byteswap()
+    return buffer.tobytes(), (rows, dim)
+
+
+def unpack_vectors(data, shape, dtype='float32'):
+    """Inverse of pack_vectors, returning a list of lists."""
+    rows, dim = shape
+    if dtype == 'float16':
+        flat = struct.unpack(f'<{rows * dim}e', data)
+    else:
+        buffer = array('f')
+        buffer.frombytes(data)
+        if sys.byteorder != 'little':
+            buffer.byteswap()
+        flat = buffer
+    return [list(flat[i * dim:(i + 1) * dim]) for i in range(rows)]
+
+
+def vectors_response(vectors, fmt, json_body, model=None):
+    """Build the response for ``vectors`` in the negotiated format.
+
+    ``json_body`` is the dict returned for JSON clients. Returns None if ``fmt``
+    is unknown or unavailable, so the caller can answer 406.
+    """
+    if fmt == 'json':
+        return jsonify(json_body)
+
+    if fmt == 'msgpack':
+        try:
+            import msgpack
+        except ImportError:
+            return None
+        data, shape = pack_vectors(vectors, 'float32')
+        body = msgpack.packb({'model': model, 'dtype': 'float32', 'shape': list(shape), 'data': data})
+        return Response(body, mimetype=MSGPACK_MIMETYPE)
+
+    if fmt in ('float32', 'float16'):
+        data, shape = pack_vectors(vectors, fmt)
+        response = Response(data, mimetype=FLOAT32_MIMETYPE if fmt == 'float32' else FLOAT16_MIMETYPE)
+        response.headers['X-Embedding-Shape'] = f'{shape[0]},{shape[1]}'
+        response.headers['X-Embedding-Dtype'] = fmt
+        if model:
+            response.headers['X-Embedding-Model'] = model
+        return response
+
+    return None
@@ -0,0 +1,48 @@
+# Background job handlers (see services/jobs.py).
+#
+# Each handler runs in a worker process, receives the job payload and a
+# JobContext, reports progress, emits partial results as it goes and returns
+# the final JSON-serializable result.
+
+
+def extract_pdf(payload, job):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+    from pdfminer.pdfpage import PDFPage
+
+    path = payload['files']['upload.pdf']
+    with open(path, 'rb') as f:
+        total = sum(1 for _ in PDFPage.get_pages(f))
+    job.progress(0, f'Extracting {total} page(s)')
+
+    pages = []
+    for number, layout in enumerate(extract_pages(path, laparams=LAParams()), 1):
+        text = ''.join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+        page = {'page': number, 'text': text.strip(), 'tables': []}
+        pages.append(page)
+        job.emit(page)
+        job.progress(number / max(total, 1), f'Page {number}/{total}')
+    return {'message': 'PDF processed successfully', 'pages': pages}
+
+
+def youtube_asr(payload, job):
+    from youtube.asr_whisper import perform_whisper_asr
+
+    video_id = payload['videoId']
+    job.progress(0, f'Transcribing {video_id}')
+    transcript, lang = perform_whisper_asr(video_id)
+    for segment in transcript:
+        job.emit(segment)
+    return {'message': 'YouTube ASR completed', 'transcript': transcript, 'lang': lang}
+
+
+def index_corpus(payload, job):
+    from rag.indexer import index_corpus as run_index
+
+    return run_index(
+        payload['path'],
+        namespace=payload.get('namespace', 'default'),
+        batch_size=int(payload.get('batch_size', 64)),
+        on_progress=job.progress,
+        on_batch=job.emit,
+    )
@@ -0,0 +1,520 @@
+# Durable background jobs.
+#
+# Long-running work (PDF extraction, ASR, corpus indexing) is queued in a local
+# SQLite database instead of running inside the request thread. A pool of
+# worker processes claims queued jobs, reports progress and partial results as
+# events, and stores the final result, so the work survives a server restart
+# and scales with the number of workers. Running jobs send heartbeats; a job
+# whose worker died (process exit or missed heartbeats) goes back to the queue
+# until it has used JOBS_MAX_ATTEMPTS attempts.
+
+import atexit
+import importlib
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from config import Config
+from services import metrics
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED = {SUCCEEDED, FAILED}
+
+# Job kind -> (module, function). Handlers are only imported by worker processes
+# and are called as handler(payload, job) with a JobContext.
+HANDLERS = {
+    'pdf_extract': ('services.job_handlers', 'extract_pdf'),
+    'youtube_asr': ('services.job_handlers', 'youtube_asr'),
+    'index_corpus': ('services.job_handlers', 'index_corpus'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    client_id TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker_id TEXT,
+    heartbeat REAL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, available_at, created_at);
+CREATE INDEX IF NOT EXISTS jobs_client ON jobs (client_id, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, seq);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()  # database paths whose schema exists
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was taken away from this worker."""
+
+
+def _connect():
+    path = Config.JOBS_DB_PATH
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == path:
+        return conn
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # Autocommit mode; writes that must be atomic open their own BEGIN IMMEDIATE
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    with _init_lock:
+        if path not in _initialized:
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+            if columns and 'client_id' not in columns:
+                # Databases created before jobs were tagged with their submitter
+                conn.execute('ALTER TABLE jobs ADD COLUMN client_id TEXT')
+            conn.executescript(SCHEMA)
+            _initialized.add(path)
+    _local.conn, _local.path = conn, path
+    return conn
+
+
+class _Transaction:
+    def __init__(self):
+        self.conn = _connect()
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def _add_event(conn, job_id, type_, data):
+    conn.execute('INSERT INTO job_events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)',
+                 (job_id, type_, json.dumps(data), time.time()))
+
+
+def job_dir(job_id):
+    """Directory holding a job's input files; removed when the job finishes."""
+    return os.path.join(Config.JOBS_DATA_DIR, job_id)
+
+
+def _remove_files(job_id):
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def _row_to_job(row, include_result=True):
+    job = {
+        'id': row['id'],
+        'kind': row['kind'],
+        'status': row['status'],
+        'progress': row['progress'],
+        'message': row['message'],
+        'error': row['error'],
+        'attempts': row['attempts'],
+        'max_attempts': row['max_attempts'],
+        'created_at': row['created_at'],
+        'started_at': row['started_at'],
+        'finished_at': row['finished_at'],
+    }
+    if include_result:
+        job['result'] = json.loads(row['result']) if row['result'] is not None else None
+    return job
+
+
+def submit(kind, payload=None, files=None, max_attempts=None, client_id=None):
+    """Queue a job and return it.
+
+    ``files`` maps names to bytes; they are written to the job's directory and
+    their paths are passed to the handler as payload['files']. ``client_id``
+    records the submitter so listings can be scoped to them.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}. Available: {', '.join(sorted(HANDLERS))}")
+    job_id = uuid.uuid4().hex
+    payload = dict(payload or {})
+    if files:
+        os.makedirs(job_dir(job_id), exist_ok=True)
+        payload['files'] = {}
+        for name, data in files.items():
+            path = os.path.join(job_dir(job_id), os.path.basename(name))
+            with open(path, 'wb') as f:
+                f.write(data)
+            payload['files'][name] = path
+
+    now = time.time()
+    with _Transaction() as conn:
+        conn.execute(
+            'INSERT INTO jobs (id, kind, client_id, payload, status, max_attempts, available_at, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, client_id, json.dumps(payload), QUEUED, max_attempts or Config.JOBS_MAX_ATTEMPTS, now, now),
+        )
+        _add_event(conn, job_id, 'status', {'status': QUEUED})
+    metrics.inc('jobs_submitted_total', kind=kind)
+    return get(job_id)
+
+
+def links(job_id):
+    return {'status_url': f'/api/jobs/{job_id}', 'events_url': f'/api/jobs/{job_id}/events'}
+
+
+def async_requested(args):
+    """True if a request's query args ask for the work to run as a background job."""
+    return args.get('async', '').lower() in ('1', 'true', 'yes')
+
+
+def get(job_id, include_result=True):
+    row = _connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+    return _row_to_job(row, include_result) if row is not None else None
+
+
+def list_jobs(client_id, status=None, limit=50):
+    """Most recent jobs submitted by ``client_id``."""
+    limit = max(1, int(limit))
+    conn = _connect()
+    if status:
+        rows = conn.execute('SELECT * FROM jobs WHERE client_id = ? AND status = ? ORDER BY created_at DESC LIMIT ?',
+                            (client_id, status, limit))
+    else:
+        rows = conn.execute('SELECT * FROM jobs WHERE client_id = ? ORDER BY created_at DESC LIMIT ?',
+                            (client_id, limit))
+    return [_row_to_job(row, include_result=False) for row in rows.fetchall()]
+
+
+def counts(client_id=None):
+    """Jobs per status, for one submitter or (locally, e.g. scripts/job_worker.py) all of them."""
+    if client_id is None:
+        rows = _connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+    else:
+        rows = _connect().execute('SELECT status, COUNT(*) FROM jobs WHERE client_id = ? GROUP BY status',
+                                  (client_id,)).fetchall()
+    return {status: count for status, count in rows}
+
+
+def events(job_id, after=0, limit=500):
+    """Return the job's events with a sequence number greater than ``after``."""
+    rows = _connect().execute(
+        'SELECT seq, type, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?',
+        (job_id, after, limit),
+    ).fetchall()
+    return [{'seq': seq, 'type': type_, 'data': json.loads(data)} for seq, type_, data in rows]
+
+
+def claim(worker_id):
+    """Atomically take the oldest runnable job; returns (id, kind, payload, attempt) or None."""
+    now = time.time()
+    with _Transaction() as conn:
+        row = conn.execute(
+            'SELECT id, kind, payload, attempts FROM jobs WHERE status = ? AND available_at <= ? '
+            'ORDER BY created_at LIMIT 1',
+            (QUEUED, now),
+        ).fetchone()
+        if row is None:
+            return None
+        attempt = row['attempts'] + 1
+        conn.execute(
+            'UPDATE jobs SET status = ?, worker_id = ?, heartbeat = ?, attempts = ?, '
+            'started_at = COALESCE(started_at, ?) WHERE id = ?',
+            (RUNNING, worker_id, now, attempt, now, row['id']),
+        )
+        _add_event(conn, row['id'], 'status', {'status': RUNNING, 'attempt': attempt, 'worker': worker_id})
+    return row['id'], row['kind'], json.loads(row['payload']), attempt
+
+
+def _update_running(conn, job_id, worker_id, sql, params):
+    # Only the worker that currently owns the job may change it; a worker whose
+    # job was requeued after a missed heartbeat must not overwrite the new attempt
+    cur = conn.execute(f'{sql} WHERE id = ? AND worker_id = ? AND status = ?',
+                       (*params, job_id, worker_id, RUNNING))
+    if cur.rowcount == 0:
+        raise JobCancelled(job_id)
+
+
+def heartbeat(job_id, worker_id):
+    with _Transaction() as conn:
+        _update_running(conn, job_id, worker_id, 'UPDATE jobs SET heartbeat = ?', (time.time(),))
+
+
+def complete(job_id, worker_id, result):
+    with _Transaction() as conn:
+        _update_running(conn, job_id, worker_id,
+                        'UPDATE jobs SET status = ?, progress = 1, result = ?, error = NULL, finished_at = ?',
+                        (SUCCEEDED, json.dumps(result), time.time()))
+        _add_event(conn, job_id, 'status', {'status': SUCCEEDED})
+    _remove_files(job_id)
+
+
+def fail(job_id, worker_id, error):
+    with _Transaction() as conn:
+        _update_running(conn, job_id, worker_id,
+                        'UPDATE jobs SET status = ?, error = ?, finished_at = ?',
+                        (FAILED, error, time.time()))
+        _add_event(conn, job_id, 'status', {'status': FAILED, 'error': error})
+    _remove_files(job_id)
+
+
+def requeue_stale(worker_ids=None, timeout=None):
+    """Retry running jobs whose worker is gone.
+
+    A job is considered orphaned if its worker is in ``worker_ids`` (processes
+    known to have exited) or has not sent a heartbeat within ``timeout``
+    seconds. Jobs that have used all attempts are marked failed.
+    Returns the number of jobs requeued or failed.
+    """
+    now = time.time()
+    cutoff = now - (timeout if timeout is not None else Config.JOBS_HEARTBEAT_TIMEOUT)
+    worker_ids = list(worker_ids or [])
+    placeholders = ','.join('?' * len(worker_ids))
+    condition = f'heartbeat < ? OR worker_id IN ({placeholders})' if worker_ids else 'heartbeat < ?'
+
+    finished = []
+    with _Transaction() as conn:
+        rows = conn.execute(
+            f'SELECT id, kind, attempts, max_attempts, worker_id FROM jobs WHERE status = ? AND ({condition})',
+            (RUNNING, cutoff, *worker_ids),
+        ).fetchall()
+        for row in rows:
+            reason = (f"worker {row['worker_id']} exited" if row['worker_id'] in worker_ids
+                      else f"worker {row['worker_id']} stopped sending heartbeats")
+            if row['attempts'] < row['max_attempts']:
+                conn.execute(
+                    'UPDATE jobs SET status = ?, worker_id = NULL, heartbeat = NULL, available_at = ? WHERE id = ?',
+                    (QUEUED, now + Config.JOBS_RETRY_DELAY * row['attempts'], row['id']),
+                )
+                _add_event(conn, row['id'], 'status', {'status': QUEUED, 'retry': True, 'reason': reason})
+                metrics.inc('jobs_retried_total', kind=row['kind'])
+            else:
+                error = f"{reason}; gave up after {row['attempts']} attempt(s)"
+                conn.execute('UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?',
+                             (FAILED, error, now, row['id']))
+                _add_event(conn, row['id'], 'status', {'status': FAILED, 'error': error})
+                finished.append(row['id'])
+    for job_id in finished:
+        _remove_files(job_id)
+    return len(rows)
+
+
+def prune(older_than=None):
+    """Delete finished jobs older than ``older_than`` seconds (JOBS_RETENTION by default)."""
+    cutoff = time.time() - (older_than if older_than is not None else Config.JOBS_RETENTION)
+    with _Transaction() as conn:
+        ids = [row[0] for row in conn.execute(
+            f"SELECT id FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished_at < ?",
+            (*FINISHED, cutoff),
+        ).fetchall()]
+        for job_id in ids:
+            conn.execute('DELETE FROM job_events WHERE job_id = ?', (job_id,))
+            conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+    for job_id in ids:
+        _remove_files(job_id)
+    return len(ids)
+
+
+class JobContext:
+    """Passed to handlers to report progress and stream partial results."""
+
+    def __init__(self, job_id, worker_id, attempt):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.attempt = attempt
+
+    def progress(self, fraction, message=None):
+        fraction = max(0.0, min(1.0, float(fraction)))
+        with _Transaction() as conn:
+            _update_running(conn, self.job_id, self.worker_id,
+                            'UPDATE jobs SET progress = ?, message = ?, heartbeat = ?',
+                            (fraction, message, time.time()))
+            _add_event(conn, self.job_id, 'progress', {'progress': fraction, 'message': message})
+
+    def emit(self, data):
+        """Publish a partial result (a page, a transcript segment, ...) to stream readers."""
+        with _Transaction() as conn:
+            _update_running(conn, self.job_id, self.worker_id, 'UPDATE jobs SET heartbeat = ?', (time.time(),))
+            _add_event(conn, self.job_id, 'partial', data)
+
+
+def load_handler(kind):
+    module_path, attr = HANDLERS[kind]
+    return getattr(importlib.import_module(module_path), attr)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def run_job(job_id, kind, payload, attempt, worker_id):
+    """Run one claimed job to completion, sending heartbeats while the handler works."""
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(Config.JOBS_HEARTBEAT_INTERVAL):
+            try:
+                heartbeat(job_id, worker_id)
+            except JobCancelled:
+                return
+            except sqlite3.Error as e:
+                print(f"Job {job_id}: heartbeat failed: {e}")
+
+    threading.Thread(target=beat, name=f'job-heartbeat-{job_id[:8]}', daemon=True).start()
+    start = time.perf_counter()
+    try:
+        result = load_handler(kind)(payload, JobContext(job_id, worker_id, attempt))
+        complete(job_id, worker_id, result)
+        print(f"Job {job_id} ({kind}) succeeded in {time.perf_counter() - start:.2f}s")
+    except JobCancelled:
+        print(f"Job {job_id} ({kind}) was requeued elsewhere; dropping this attempt")
+    except Exception as e:
+        # Handler errors are not retried: they would fail the same way again
+        try:
+            fail(job_id, worker_id, f'{type(e).__name__}: {e}')
+        except JobCancelled:
+            pass
+        print(f"Job {job_id} ({kind}) failed: {type(e).__name__}: {e}")
+    finally:
+        done.set()
+
+
+def run_worker(stop_event=None, poll_interval=None, parent_pid=None):
+    """Claim and run jobs until ``stop_event`` is set or the ``parent_pid`` process is gone."""
+    worker_id = worker_name()
+    poll_interval = poll_interval or Config.JOBS_POLL_INTERVAL
+    while stop_event is None or not stop_event.is_set():
+        if parent_pid is not None and os.getppid() != parent_pid:
+            print(f"Job worker {worker_id}: parent process exited; stopping")
+            return
+        try:
+            claimed = claim(worker_id)
+        except sqlite3.Error as e:
+            print(f"Job worker {worker_id}: claim failed: {e}")
+            claimed = None
+        if claimed is None:
+            time.sleep(poll_interval)
+            continue
+        run_job(*claimed, worker_id)
+
+
+# Entry point for pool workers. Workers run this script in a fresh interpreter
+# rather than through multiprocessing, whose spawn start method re-imports the
+# launching script (app.py / run_server.py) in every child, registering all
+# blueprints and starting model warmup there too.
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'job_worker.py')
+
+
+class WorkerPool:
+    """Worker processes plus a supervisor thread that restarts crashed workers
+    and requeues the jobs they held."""
+
+    def __init__(self, size, supervise_interval=None):
+        self.size = size
+        self.supervise_interval = supervise_interval or max(1.0, Config.JOBS_HEARTBEAT_INTERVAL)
+        self._processes = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _spawn(self):
+        # A new interpreter, not fork: the server process has threads and open connections
+        return subprocess.Popen([sys.executable, WORKER_SCRIPT, '--single', '--parent-pid', str(os.getpid())])
+
+    def start(self):
+        self._processes = [self._spawn() for _ in range(self.size)]
+        self._thread = threading.Thread(target=self._supervise, name='job-supervisor', daemon=True)
+        self._thread.start()
+        return self
+
+    def _supervise(self):
+        last_prune = 0
+        while not self._stop.wait(self.supervise_interval):
+            dead = []
+            for i, process in enumerate(self._processes):
+                if process.poll() is not None:
+                    print(f"Job worker {process.pid} exited with code {process.returncode}; restarting")
+                    dead.append(f'{socket.gethostname()}:{process.pid}')
+                    self._processes[i] = self._spawn()
+            try:
+                requeue_stale(dead)
+                if time.time() - last_prune > 3600:
+                    prune()
+                    last_prune = time.time()
+            except sqlite3.Error as e:
+                print(f"Job supervisor: {e}")
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for process in self._processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def join(self):
+        self._thread.join()
+
+    def stats(self):
+        return {'workers': self.size, 'alive': sum(p.poll() is None for p in self._processes)}
+
+
+_pool = None
+_pool_started = False
+_pool_lock = threading.Lock()
+
+
+def start_workers(size=None):
+    """Start the in-server worker pool once (no-op when JOBS_WORKERS is 0)."""
+    global _pool, _pool_started
+    with _pool_lock:
+        if not _pool_started:
+            _pool_started = True
+            size = Config.JOBS_WORKERS if size is None else size
+            if size > 0:
+                _pool = WorkerPool(size).start()
+                atexit.register(_pool.stop)
+    return _pool
+
+
+def init_app(app):
+    """Start the worker pool with the server.
+
+    The debug reloader imports the app in a watcher process that never serves
+    requests, so outside the reloader's serving child the pool is started by
+    the first request instead of at import time.
+    """
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_workers()
+
+    @app.before_request
+    def _start_job_workers():
+        if not _pool_started:
+            start_workers()
+
+
+def pool_stats():
+    return _pool.stats() if _pool is not None else {'workers': 0, 'alive': 0}
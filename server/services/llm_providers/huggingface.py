@@ -0,0 +1,127 @@
+# Hugging Face inference router integration
+#
+# Shared by /process and /api/llm/batch. Identical in-flight requests are
+# coalesced through a single-flight group, and successful outputs are kept in
+# a small TTL cache so repeated texts (the same page asked for again) do not
+# go upstream at all.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from config import Config
+from services import metrics
+from services.singleflight import hf_flight, normalize_text, request_key
+
+# Get Hugging Face token from environment variable or config
+HF_TOKEN = os.environ.get('HF_TOKEN') or 'YOUR_ACTUAL_HUGGINGFACE_TOKEN_HERE'  # https://huggingface.co/settings/tokens
+# Base URL of the inference router; point at scripts/fake_upstream.py for benchmarks
+HF_API_BASE = os.environ.get('HF_API_BASE', 'https://router.huggingface.co').rstrip('/')
+
+DEFAULT_MODEL = "google/flan-t5-base"
+
+MODEL_MAP = {
+    "summarize": "facebook/bart-large-cnn",
+    "chat": "google/flan-t5-base",
+    "explain_code": "google/flan-t5-base",
+    "extract_points": "facebook/bart-large-cnn",
+    "improve_text": "google/flan-t5-base"
+}
+
+PROMPTS = {
+    "summarize": "Summarize this clearly and briefly:\n{text}",
+    "chat": "You are a helpful assistant. Reply conversationally to:\n{text}",
+    "explain_code": "Explain what this code does in simple English:\n{text}",
+    "extract_points": "Extract 3–5 key bullet points from this text:\n{text}",
+    "improve_text": "Rewrite this text with better grammar and clarity:\n{text}"
+}
+
+TOKEN_ERROR = "Error: Hugging Face token not configured. Please set HF_TOKEN environment variable or update services/llm_providers/huggingface.py"
+
+_cache = OrderedDict()  # key -> (expires_at, output)
+_cache_lock = threading.Lock()
+
+
+def token_configured():
+    return bool(HF_TOKEN) and HF_TOKEN != 'YOUR_ACTUAL_HUGGINGFACE_TOKEN_HERE'
+
+
+def build_prompt(task, text):
+    template = PROMPTS.get(task)
+    return template.format(text=text) if template else text
+
+
+def query_hf(model, prompt):
+    """Call the Hugging Face router and return (ok, output or error message)."""
+    try:
+        with metrics.timed("hf"):
+            response = requests.post(
+                f"{HF_API_BASE}/models/{model}",
+                headers={"Authorization": f"Bearer {HF_TOKEN}"},
+                json={"inputs": prompt},
+                timeout=Config.HF_TIMEOUT
+            )
+    except requests.Timeout:
+        return False, f"Error: Hugging Face API did not respond within {Config.HF_TIMEOUT:g}s"
+
+    # Check if the request was successful
+    if response.status_code != 200:
+        return False, f"Error: Hugging Face API returned status {response.status_code}. Response: {response.text}"
+
+    result = response.json()
+    output = result[0]["generated_text"] if isinstance(result, list) and len(result) > 0 and "generated_text" in result[0] else str(result)
+    return True, output
+
+
+def _cache_get(key):
+    if Config.HF_CACHE_SIZE <= 0:
+        return None
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            del _cache[key]
+            entry = None
+        if entry is not None:
+            _cache.move_to_end(key)
+    metrics.record_cache('hf', entry is not None)
+    return entry[1] if entry else None
+
+
+def _cache_put(key, output):
+    if Config.HF_CACHE_SIZE <= 0:
+        return
+    with _cache_lock:
+        _cache[key] = (time.monotonic() + Config.HF_CACHE_TTL, output)
+        _cache.move_to_end(key)
+        while len(_cache) > Config.HF_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def run_task(task, text, normalized=None):
+    """Run ``task`` on ``text`` and return (ok, output or error message).
+
+    ``normalized`` lets callers that run several tasks on one text normalize it once.
+    """
+    if not token_configured():
+        return False, TOKEN_ERROR
+
+    model = MODEL_MAP.get(task, DEFAULT_MODEL)
+    if normalized is None:
+        normalized = normalize_text(text)
+    key = request_key(task, model, normalized)
+
+    output = _cache_get(key)
+    if output is not None:
+        return True, output
+
+    # Identical in-flight requests (same task, model and text) share one upstream call
+    try:
+        ok, output = hf_flight.do(key, lambda: query_hf(model, build_prompt(task, text)))
+    except TimeoutError as e:
+        return False, f"Error: {e}"
+    if ok:
+        _cache_put(key, output)
+    return ok, output
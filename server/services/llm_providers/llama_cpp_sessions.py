@@ -0,0 +1,194 @@
+# Per-conversation KV cache reuse for local llama.cpp models.
+#
+# Each chat turn resends the whole message history. Without state reuse a
+# local model re-evaluates the entire conversation prompt every reply. The
+# SessionManager keeps the model state (token ids + KV cache) of recent
+# conversations. Before a turn it loads that state back into the model, and
+# llama.cpp then only evaluates the tokens after the longest shared prefix.
+# Least recently used sessions are spilled to disk (or dropped) when more than
+# max_sessions are live.
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from services import metrics
+
+
+def llama_cpp_available():
+    try:
+        import llama_cpp  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def format_messages(messages):
+    """Render chat messages as a prompt.
+
+    The rendering is append-only: the prompt for turn N+1 starts with the
+    prompt and reply of turn N, which is what makes prefix reuse possible.
+    """
+    parts = []
+    for message in messages or []:
+        role = message.get('role', 'user')
+        parts.append(f"<|{role}|>\n{message.get('content', '')}\n")
+    parts.append("<|assistant|>\n")
+    return ''.join(parts)
+
+
+def common_prefix_length(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class _Session:
+    __slots__ = ('model_path', 'tokens', 'state')
+
+    def __init__(self, model_path, tokens, state):
+        self.model_path = model_path
+        self.tokens = tokens  # token ids currently held in the KV cache
+        self.state = state    # llama_cpp.LlamaState
+
+
+class SessionManager:
+    def __init__(self, max_sessions=8, spill_dir='', n_ctx=4096, max_models=2):
+        self.max_sessions = max_sessions
+        self.spill_dir = spill_dir
+        self.n_ctx = n_ctx
+        self.max_models = max(1, max_models)
+        self._sessions = OrderedDict()  # session_id -> _Session
+        self._lock = threading.Lock()
+        self._models = OrderedDict()  # model_path -> (Llama, lock)
+        self._models_lock = threading.Lock()
+
+    def load_model(self, model_path):
+        """Load (once) and return the model and the lock serializing its use.
+
+        At most max_models stay loaded; the least recently used one is dropped
+        (requests already using it keep their reference until they finish).
+        """
+        with self._models_lock:
+            entry = self._models.get(model_path)
+            if entry is None:
+                from llama_cpp import Llama
+                entry = self._models[model_path] = (Llama(model_path=model_path, n_ctx=self.n_ctx, verbose=False), threading.Lock())
+                while len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+            self._models.move_to_end(model_path)
+            return entry
+
+    def _spill_path(self, session_id):
+        name = hashlib.sha256(session_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, f'{name}.llama-session')
+
+    def _get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(session_id)
+        try:
+            with open(path, 'rb') as f:
+                session = pickle.load(f)
+            os.unlink(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Failed to restore llama.cpp session {session_id}: {e}")
+            return None
+        metrics.inc('llama_session_restores_total')
+        self._put(session_id, session)
+        return session
+
+    def _put(self, session_id, session):
+        evicted = []
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False))
+        for evicted_id, evicted_session in evicted:
+            self._spill(evicted_id, evicted_session)
+
+    def _spill(self, session_id, session):
+        metrics.inc('llama_session_evictions_total')
+        if not self.spill_dir:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            tmp_path = self._spill_path(session_id) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(session, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._spill_path(session_id))
+        except Exception as e:
+            print(f"Failed to spill llama.cpp session {session_id}: {e}")
+
+    def drop(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.spill_dir and os.path.exists(self._spill_path(session_id)):
+            os.unlink(self._spill_path(session_id))
+
+    def generate(self, session_id, model_path, messages, stream=False, **params):
+        """Generate a reply, reusing the session's KV cache for the shared prompt prefix.
+
+        Returns the reply text, or an iterator of text chunks when ``stream`` is set.
+        """
+        llm, model_lock = self.load_model(model_path)
+        prompt_tokens = llm.tokenize(format_messages(messages).encode('utf-8'))
+        params.setdefault('max_tokens', 512)
+
+        def run():
+            with model_lock:
+                reused = self._restore(llm, session_id, model_path, prompt_tokens)
+                self._report(session_id, reused, len(prompt_tokens))
+                # create_completion only evaluates tokens past the prefix already in the KV cache
+                if stream:
+                    for chunk in llm.create_completion(prompt=prompt_tokens, stream=True, **params):
+                        yield chunk['choices'][0]['text']
+                else:
+                    result = llm.create_completion(prompt=prompt_tokens, **params)
+                    yield result['choices'][0]['text']
+                if session_id:
+                    self._save(llm, session_id, model_path)
+
+        if stream:
+            return run()
+        return ''.join(run())
+
+    def _restore(self, llm, session_id, model_path, prompt_tokens):
+        session = self._get(session_id) if session_id else None
+        if session is None or session.model_path != model_path:
+            llm.reset()
+            return 0
+        llm.load_state(session.state)
+        return common_prefix_length(session.tokens, prompt_tokens)
+
+    def _save(self, llm, session_id, model_path):
+        state = llm.save_state()
+        tokens = [int(t) for t in state.input_ids[:state.n_tokens]]
+        self._put(session_id, _Session(model_path, tokens, state))
+
+    def _report(self, session_id, reused, total):
+        metrics.inc('llama_prompt_tokens_total', reused, kind='reused')
+        metrics.inc('llama_prompt_tokens_total', total - reused, kind='evaluated')
+        print(f"llama.cpp session {session_id or '-'}: reused {reused} of {total} prompt tokens, "
+              f"evaluating {total - reused}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'loaded_models': len(self._models),
+                'spill_dir': self.spill_dir or None,
+            }
@@ -1,11 +1,44 @@
-# Placeholder for open_model_llama_cpp integration
+# Local model integration via llama.cpp (llama-cpp-python)
+#
+# Runs when llama-cpp-python is installed and the requested model name is
+# configured (LLAMA_CPP_MODEL_PATH for "default", others in LLAMA_CPP_MODELS).
+# Pass a ``session_id`` per conversation so the KV cache is reused between
+# turns. Otherwise a dummy response is returned.
+
+from config import Config
+from services import metrics
+from services.llm_providers.llama_cpp_sessions import SessionManager, llama_cpp_available
+
+session_manager = SessionManager(
+    max_sessions=Config.LLAMA_CPP_MAX_SESSIONS,
+    spill_dir=Config.LLAMA_CPP_SPILL_DIR,
+    n_ctx=Config.LLAMA_CPP_N_CTX,
+    max_models=Config.LLAMA_CPP_MAX_MODELS,
+)
+
+def known_model(model="default"):
+    """True if ``model`` may be requested: a configured name, or "default"."""
+    return model in (None, "default") or model in Config.LLAMA_CPP_MODELS
+
+def resolve_model_path(model="default"):
+    """Map a configured model name to its path; None if "default" is not configured.
+
+    Raises ValueError for names outside LLAMA_CPP_MODELS.
+    """
+    if not known_model(model):
+        raise ValueError(f"Unknown llama.cpp model: {model}")
+    return Config.LLAMA_CPP_MODELS.get(model or "default")
+
+def generate_llama_cpp_response(messages, model="default", stream=False, session_id=None, **params):
+    model_path = resolve_model_path(model)
+    if model_path and llama_cpp_available():
+        if stream:
+            return session_manager.generate(session_id, model_path, messages, stream=True, **params)
+        with metrics.timed('llama_cpp'):
+            return session_manager.generate(session_id, model_path, messages, **params)
 
-def generate_llama_cpp_response(messages, model="default", stream=False):
     # Dummy function to simulate llama.cpp response
     print(f"Generating llama.cpp response for model: {model}")
     if stream:
-        yield "This is a streamed ",
-        yield "dummy response from ",
-        yield "llama.cpp."
-    else:
-        return "This is a dummy response from llama.cpp."
+        return iter(["This is a streamed ", "dummy response from ", "llama.cpp."])
+    return "This is a dummy response from llama.cpp."
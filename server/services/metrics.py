@@ -0,0 +1,258 @@
+# Lightweight in-process metrics with Prometheus text exposition.
+#
+# Every thread writes into its own shard, so the hot path (counter increments
+# and histogram observations) never takes a lock. Shards are only merged when
+# /api/metrics is scraped; shards of threads that have exited are folded into
+# a single retired shard so per-request threads do not accumulate.
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# name -> (type, help, buckets)
+FAMILIES = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.', None),
+    'http_request_exceptions_total': ('counter', 'Requests that ended with an unhandled exception.', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by endpoint.', LATENCY_BUCKETS),
+    'http_request_size_bytes': ('histogram', 'Request payload size by endpoint.', SIZE_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response payload size by endpoint.', SIZE_BUCKETS),
+    'http_requests_in_flight': ('gauge', 'Requests currently being handled by endpoint.', None),
+    'upstream_call_duration_seconds': ('histogram', 'Upstream/model stage latency (hf, llama_cpp, pdf, ...).', LATENCY_BUCKETS),
+    'upstream_call_errors_total': ('counter', 'Upstream/model stage calls that raised.', None),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss).', None),
+    'scheduler_queue_wait_seconds': ('histogram', 'Time requests waited for an execution slot by class.', LATENCY_BUCKETS),
+    'scheduler_queued_requests': ('gauge', 'Requests currently waiting for a slot by class.', None),
+    'scheduler_rejections_total': ('counter', 'Requests rejected with 429 by class and reason.', None),
+    'llama_prompt_tokens_total': ('counter', 'llama.cpp prompt tokens by kind (reused from the session KV cache or evaluated).', None),
+    'llama_session_evictions_total': ('counter', 'llama.cpp sessions evicted from memory (spilled to disk if configured).', None),
+    'llama_session_restores_total': ('counter', 'llama.cpp sessions restored from disk.', None),
+    'singleflight_requests_total': ('counter', 'Coalesced work by group and role (leader ran it, follower reused it).', None),
+    'subsystem_startup_seconds': ('gauge', 'Time spent importing and registering each blueprint at startup.', None),
+    'model_warmup_seconds': ('gauge', 'Time spent preloading each warmed-up model.', None),
+    'jobs_submitted_total': ('counter', 'Background jobs queued by kind.', None),
+    'jobs_retried_total': ('counter', 'Background jobs requeued after their worker died, by kind.', None),
+}
+
+_MAX_LIVE_SHARDS = 64
+
+
+class _Shard:
+    __slots__ = ('counters', 'gauges', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+
+_local = threading.local()
+_shards = []  # list of (thread, shard)
+_shards_lock = threading.Lock()
+_retired = _Shard()
+
+
+def _merge_into(target, shard):
+    for key, value in shard.counters.items():
+        target.counters[key] = target.counters.get(key, 0) + value
+    for key, value in shard.gauges.items():
+        target.gauges[key] = target.gauges.get(key, 0) + value
+    for key, (buckets, total, count) in shard.histograms.items():
+        entry = target.histograms.get(key)
+        if entry is None:
+            target.histograms[key] = [list(buckets), total, count]
+        else:
+            entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+            entry[1] += total
+            entry[2] += count
+
+
+def _compact_locked():
+    # Fold the shards of finished threads into the retired shard.
+    live = []
+    for thread, shard in _shards:
+        if thread.is_alive():
+            live.append((thread, shard))
+        else:
+            _merge_into(_retired, shard)
+    _shards[:] = live
+
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _local.shard = _Shard()
+        with _shards_lock:
+            if len(_shards) >= _MAX_LIVE_SHARDS:
+                _compact_locked()
+            _shards.append((threading.current_thread(), shard))
+    return shard
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())) if labels else ())
+
+
+def inc(name, amount=1, **labels):
+    """Increment a counter."""
+    counters = _shard().counters
+    key = _key(name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+
+def gauge_add(name, delta, **labels):
+    """Add ``delta`` to a gauge (gauges are summed across threads)."""
+    gauges = _shard().gauges
+    key = _key(name, labels)
+    gauges[key] = gauges.get(key, 0) + delta
+
+
+def observe(name, value, **labels):
+    """Record ``value`` in a histogram declared in FAMILIES."""
+    bounds = FAMILIES[name][2]
+    histograms = _shard().histograms
+    key = _key(name, labels)
+    entry = histograms.get(key)
+    if entry is None:
+        entry = histograms[key] = [[0] * (len(bounds) + 1), 0.0, 0]
+    entry[0][bisect_left(bounds, value)] += 1
+    entry[1] += value
+    entry[2] += 1
+
+
+@contextmanager
+def timed(stage):
+    """Time an upstream/model stage, e.g. ``with metrics.timed('hf'):``."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc('upstream_call_errors_total', stage=stage)
+        raise
+    finally:
+        observe('upstream_call_duration_seconds', time.perf_counter() - start, stage=stage)
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup; hit ratios are derived at scrape time."""
+    inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+
+def snapshot():
+    """Merge all shards into a single shard for reporting."""
+    merged = _Shard()
+    with _shards_lock:
+        _compact_locked()
+        _merge_into(merged, _retired)
+        shards = [shard for _, shard in _shards]
+    for shard in shards:
+        # dict() copies are atomic under the GIL, so no lock is needed here
+        _merge_into(merged, _ShardView(shard))
+    return merged
+
+
+class _ShardView:
+    __slots__ = ('counters', 'gauges', 'histograms')
+
+    def __init__(self, shard):
+        self.counters = dict(shard.counters)
+        self.gauges = dict(shard.gauges)
+        self.histograms = {k: (list(v[0]), v[1], v[2]) for k, v in dict(shard.histograms).items()}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _fmt_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Return all metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    series = {}
+    for source in (data.counters, data.gauges, data.histograms):
+        for (name, labels), value in source.items():
+            series.setdefault(name, []).append((labels, value))
+
+    # Derived cache hit ratio per cache
+    lookups = {}
+    for labels, value in series.get('cache_requests_total', []):
+        label_map = dict(labels)
+        totals = lookups.setdefault(label_map.get('cache', ''), [0, 0])
+        totals[0 if label_map.get('result') == 'hit' else 1] += value
+
+    lines = []
+    for name in sorted(series):
+        kind, help_text, bounds = FAMILIES.get(name, ('untyped', name, None))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series[name]):
+            if kind != 'histogram':
+                lines.append(f'{name}{_fmt_labels(labels)} {_fmt_value(value)}')
+                continue
+            buckets, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, buckets):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_fmt_labels(labels, ("le", bound))} {cumulative}')
+            lines.append(f'{name}_bucket{_fmt_labels(labels, ("le", "+Inf"))} {count}')
+            lines.append(f'{name}_sum{_fmt_labels(labels)} {_fmt_value(total)}')
+            lines.append(f'{name}_count{_fmt_labels(labels)} {count}')
+
+    if lookups:
+        lines.append('# HELP cache_hit_ratio Fraction of cache lookups that were hits.')
+        lines.append('# TYPE cache_hit_ratio gauge')
+        for cache in sorted(lookups):
+            hits, misses = lookups[cache]
+            ratio = hits / (hits + misses) if hits + misses else 0.0
+            lines.append(f'cache_hit_ratio{_fmt_labels([("cache", cache)])} {ratio}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Install request hooks that record per-endpoint latency, sizes and in-flight counts."""
+
+    @app.before_request
+    def _metrics_before_request():
+        endpoint = request.endpoint or 'unmatched'
+        g._metrics_start = time.perf_counter()
+        g._metrics_endpoint = endpoint
+        gauge_add('http_requests_in_flight', 1, endpoint=endpoint)
+        if request.content_length:
+            observe('http_request_size_bytes', request.content_length, endpoint=endpoint)
+
+    @app.after_request
+    def _metrics_after_request(response):
+        endpoint = g.get('_metrics_endpoint', request.endpoint or 'unmatched')
+        inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+        if not response.is_streamed:
+            observe('http_response_size_bytes', response.calculate_content_length() or 0, endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def _metrics_teardown_request(exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        endpoint = g.pop('_metrics_endpoint', 'unmatched')
+        observe('http_request_duration_seconds', time.perf_counter() - start, endpoint=endpoint)
+        gauge_add('http_requests_in_flight', -1, endpoint=endpoint)
+        if exc is not None:
+            inc('http_request_exceptions_total', endpoint=endpoint)
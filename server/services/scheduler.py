@@ -0,0 +1,245 @@
+# Admission control and priority scheduling.
+#
+# Requests are split into two classes: interactive (chat, summarize, ...) and
+# bulk (PDF extraction, ASR, indexing, ...). Each client has a token bucket per
+# class, and a fixed number of execution slots is shared between the classes.
+# Bulk work may only hold SCHEDULER_BULK_SLOTS of them, and when a slot frees
+# up, waiting interactive requests are always served before bulk ones. When a
+# class's wait queue is full, new requests are rejected with 429 immediately
+# rather than piling up.
+
+import heapq
+import itertools
+import threading
+import time
+
+from flask import g, jsonify, request
+
+from config import Config
+from services import metrics
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+PRIORITY = {INTERACTIVE: 0, BULK: 1}
+
+# Flask endpoints treated as bulk work; everything else not exempt is interactive
+BULK_ENDPOINTS = {
+    'pdf.extract_pdf',
+    'ocr.ocr_image',
+    'youtube.perform_asr',
+    'rag.embed',
+    'rag.upsert',
+    'speech.speech_to_text',
+    'jobs.submit_job',
+}
+# Cheap endpoints that are never queued or rate limited. Job event streams stay
+# open for the whole job, so they must not hold an execution slot.
+EXEMPT_ENDPOINTS = {'home', 'health_check', 'static', 'jobs.job_events'}
+EXEMPT_BLUEPRINTS = {'auth', 'metrics', 'warmup'}
+
+_MAX_BUCKETS = 10000
+
+
+def request_class(endpoint):
+    """Return the scheduling class for a Flask endpoint, or None if it is exempt."""
+    if endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+        return None
+    if endpoint.split('.', 1)[0] in EXEMPT_BLUEPRINTS:
+        return None
+    return BULK if endpoint in BULK_ENDPOINTS else INTERACTIVE
+
+
+def client_id():
+    """Identify the caller for rate limiting.
+
+    Bearer tokens are not verified yet (/api/auth/token hands out a fixed
+    placeholder), so keying on them would let a client mint a fresh bucket per
+    request by rotating tokens, and would put every real user in one shared
+    bucket. Until tokens carry a verified user id, the remote address is used.
+    """
+    return 'ip:' + (request.remote_addr or 'unknown')
+
+
+class RateLimiter:
+    """Per-client, per-class token buckets."""
+
+    def __init__(self, limits):
+        self.limits = limits  # class -> (rate per second, burst)
+        self._lock = threading.Lock()
+        self._buckets = {}  # (client, class) -> [tokens, updated]
+
+    def allow(self, client, cls):
+        """Take one token; returns (allowed, seconds until a token is available)."""
+        rate, burst = self.limits[cls]
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((client, cls))
+            if bucket is None:
+                if len(self._buckets) >= _MAX_BUCKETS:
+                    self._evict_idle(now)
+                bucket = self._buckets[(client, cls)] = [burst, now]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return True, 0.0
+            bucket[0] = tokens
+            return False, (1 - tokens) / rate if rate > 0 else 60.0
+
+    def _evict_idle(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        for key, (tokens, updated) in list(self._buckets.items()):
+            rate, burst = self.limits[key[1]]
+            if tokens + (now - updated) * rate >= burst:
+                del self._buckets[key]
+
+
+class _Waiter:
+    __slots__ = ('cls', 'event', 'granted', 'cancelled')
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class Scheduler:
+    """Bounded execution slots with priority queues per request class."""
+
+    def __init__(self, slots, bulk_slots, queue_depth, queue_timeout):
+        self.slots = slots
+        self.bulk_slots = min(bulk_slots, slots)
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._free = slots
+        self._bulk_running = 0
+        self._queued = {INTERACTIVE: 0, BULK: 0}
+        self._waiting = []  # heap of (priority, seq, waiter)
+        self._seq = itertools.count()
+
+    def _can_run_locked(self, cls):
+        return self._free > 0 and (cls != BULK or self._bulk_running < self.bulk_slots)
+
+    def _take_locked(self, cls):
+        self._free -= 1
+        if cls == BULK:
+            self._bulk_running += 1
+
+    def acquire(self, cls):
+        """Wait for a slot. Returns (admitted, reason, seconds waited)."""
+        start = time.perf_counter()
+        with self._lock:
+            if self._can_run_locked(cls):
+                self._take_locked(cls)
+                return True, None, 0.0
+            if self._queued[cls] >= self.queue_depth[cls]:
+                return False, 'queue_full', 0.0
+            waiter = _Waiter(cls)
+            heapq.heappush(self._waiting, (PRIORITY[cls], next(self._seq), waiter))
+            self._queued[cls] += 1
+
+        metrics.gauge_add('scheduler_queued_requests', 1, **{'class': cls})
+        try:
+            waiter.event.wait(self.queue_timeout)
+            with self._lock:
+                if not waiter.granted:
+                    # Left in the heap and skipped by _dispatch_locked
+                    waiter.cancelled = True
+                    self._queued[cls] -= 1
+                    return False, 'timeout', time.perf_counter() - start
+            return True, None, time.perf_counter() - start
+        finally:
+            metrics.gauge_add('scheduler_queued_requests', -1, **{'class': cls})
+
+    def release(self, cls):
+        with self._lock:
+            self._free += 1
+            if cls == BULK:
+                self._bulk_running -= 1
+            self._dispatch_locked()
+
+    def _dispatch_locked(self):
+        # Hand free slots to the highest-priority waiters that are allowed to run
+        blocked = []
+        while self._waiting and self._free > 0:
+            item = heapq.heappop(self._waiting)
+            waiter = item[2]
+            if waiter.cancelled:
+                continue
+            if not self._can_run_locked(waiter.cls):
+                blocked.append(item)
+                continue
+            self._take_locked(waiter.cls)
+            self._queued[waiter.cls] -= 1
+            waiter.granted = True
+            waiter.event.set()
+        for item in blocked:
+            heapq.heappush(self._waiting, item)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'free': self._free,
+                'bulk_running': self._bulk_running,
+                'queued': dict(self._queued),
+            }
+
+
+scheduler = Scheduler(Config.SCHEDULER_SLOTS, Config.SCHEDULER_BULK_SLOTS,
+                      Config.SCHEDULER_QUEUE_DEPTH, Config.SCHEDULER_QUEUE_TIMEOUT)
+rate_limiter = RateLimiter(Config.RATE_LIMITS)
+
+
+def describe_limits():
+    """Per-class limits as reported by /api/auth/me."""
+    return {
+        cls: {
+            'priority': PRIORITY[cls],
+            'rate_per_second': rate,
+            'burst': burst,
+            'max_queue': Config.SCHEDULER_QUEUE_DEPTH[cls],
+        }
+        for cls, (rate, burst) in Config.RATE_LIMITS.items()
+    }
+
+
+def _reject(cls, reason, message, retry_after):
+    metrics.inc('scheduler_rejections_total', reason=reason, **{'class': cls})
+    response = jsonify({'error': message, 'reason': reason, 'retry_after': round(retry_after, 2)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def init_app(app):
+    """Install admission control as request hooks (register after metrics.init_app)."""
+    if not Config.SCHEDULER_ENABLED:
+        return
+
+    @app.before_request
+    def _admit_request():
+        if request.method == 'OPTIONS':
+            return None
+        cls = request_class(request.endpoint)
+        if cls is None:
+            return None
+
+        allowed, retry_after = rate_limiter.allow(client_id(), cls)
+        if not allowed:
+            return _reject(cls, 'rate_limit', 'Rate limit exceeded', retry_after)
+
+        admitted, reason, waited = scheduler.acquire(cls)
+        metrics.observe('scheduler_queue_wait_seconds', waited, **{'class': cls})
+        if not admitted:
+            return _reject(cls, reason, 'Server busy, try again later', 1.0)
+        g._scheduler_class = cls
+        return None
+
+    @app.teardown_request
+    def _release_slot(exc):
+        cls = g.pop('_scheduler_class', None)
+        if cls is not None:
+            scheduler.release(cls)
@@ -0,0 +1,95 @@
+# Single-flight request coalescing.
+#
+# When several requests need the same expensive result at the same time
+# (e.g. many users summarizing the same shared article), only the first one
+# (the leader) does the work; the others (followers) wait for the leader and
+# receive its result or exception. Nothing is cached once the call finishes.
+
+import hashlib
+import threading
+
+from config import Config
+from services import metrics
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies of a text coalesce.
+
+    ``text`` must be a string or None; routes validate request input first.
+    """
+    return ' '.join((text or '').split())
+
+
+def request_key(*parts):
+    """Hash the parts of a request (task, model, input, ...) into a coalescing key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        elif not isinstance(part, (bytes, bytearray)):
+            part = repr(part).encode('utf-8')
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, timeout=None):
+        """Run ``fn()`` once per key among concurrent callers and share its outcome.
+
+        Followers wait up to ``timeout`` seconds (SINGLEFLIGHT_TIMEOUT by default)
+        for the leader, then raise TimeoutError. ``fn`` should bound its own
+        upstream calls, since the leader itself is not interrupted.
+        """
+        if timeout is None:
+            timeout = Config.SINGLEFLIGHT_TIMEOUT
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.inc('singleflight_requests_total', group=self.name, role='follower')
+            if not call.event.wait(timeout):
+                raise TimeoutError(f'Timed out waiting for in-flight {self.name} request')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        metrics.inc('singleflight_requests_total', group=self.name, role='leader')
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+# Shared groups, one per kind of upstream work
+hf_flight = SingleFlight('hf')
+llm_flight = SingleFlight('llm')
+pdf_flight = SingleFlight('pdf')
+ocr_flight = SingleFlight('ocr')
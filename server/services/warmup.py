@@ -0,0 +1,110 @@
+# Startup timing and background model warmup.
+#
+# Heavy dependencies (pdfminer, pyttsx3, sentence-transformers, PaddleOCR,
+# Whisper, Vosk) are imported lazily by the code that needs them. This module
+# lets an operator preload selected ones in a background thread so the first
+# real request does not pay the import/model-load cost, while /api/health and
+# /process are served immediately after startup.
+
+import importlib
+import threading
+import time
+
+from services import metrics
+
+_lock = threading.Lock()
+_startup = {}  # subsystem -> seconds spent importing/registering it
+_status = {}   # model -> {'state', 'seconds', 'error'}
+
+
+def _import(*module_names):
+    def warm():
+        for module_name in module_names:
+            importlib.import_module(module_name)
+    return warm
+
+
+def _warm_tts():
+    from speech.tts_pyttsx3 import get_engine
+    # speech/tts_pyttsx3.py keeps the engine, so later requests reuse the loaded driver
+    get_engine()
+
+
+def _warm_llama_cpp():
+    from services.llm_providers.open_model_llama_cpp import resolve_model_path, session_manager
+    model_path = resolve_model_path('default')
+    if not model_path:
+        raise RuntimeError('LLAMA_CPP_MODEL_PATH is not set')
+    session_manager.load_model(model_path)
+
+
+# Warmup name -> callable that loads the model or dependency
+WARMERS = {
+    'pdf': _import('pdfminer.high_level', 'pdfminer.layout'),
+    'tts': _warm_tts,
+    'embeddings': _import('sentence_transformers'),
+    'ocr': _import('paddleocr'),
+    'tesseract': _import('pytesseract'),
+    'whisper': _import('faster_whisper'),
+    'vosk': _import('vosk'),
+    'langdetect': _import('langdetect'),
+    'llama_cpp': _warm_llama_cpp,
+}
+
+
+def record_startup(subsystem, seconds):
+    """Record how long a subsystem took to import and register."""
+    with _lock:
+        _startup[subsystem] = seconds
+    metrics.gauge_add('subsystem_startup_seconds', seconds, subsystem=subsystem)
+
+
+def startup_timings():
+    with _lock:
+        return {name: round(seconds, 4) for name, seconds in _startup.items()}
+
+
+def warmup_status():
+    with _lock:
+        return {name: dict(status) for name, status in _status.items()}
+
+
+def warm_model(name):
+    """Load one model synchronously and return its status entry."""
+    with _lock:
+        _status[name] = {'state': 'loading', 'seconds': None, 'error': None}
+    start = time.perf_counter()
+    try:
+        WARMERS[name]()
+        state, error = 'ready', None
+    except Exception as e:
+        state, error = 'error', f'{type(e).__name__}: {e}'
+    seconds = round(time.perf_counter() - start, 4)
+    with _lock:
+        _status[name] = {'state': state, 'seconds': seconds, 'error': error}
+        result = dict(_status[name])
+    if state == 'ready':
+        metrics.gauge_add('model_warmup_seconds', seconds, model=name)
+    return result
+
+
+def start_warmup(names):
+    """Preload the given models in a background thread.
+
+    Returns the names that were queued; unknown names raise ValueError.
+    """
+    unknown = [name for name in names if name not in WARMERS]
+    if unknown:
+        raise ValueError(f"Unknown warmup target(s): {', '.join(unknown)}. Available: {', '.join(sorted(WARMERS))}")
+
+    with _lock:
+        queued = [name for name in names if _status.get(name, {}).get('state') not in ('pending', 'loading', 'ready')]
+        for name in queued:
+            _status[name] = {'state': 'pending', 'seconds': None, 'error': None}
+
+    if queued:
+        def run():
+            for name in queued:
+                warm_model(name)
+        threading.Thread(target=run, name='model-warmup', daemon=True).start()
+    return queued
@@ -1,10 +1,29 @@
-import pyttsx3
+import threading
+
+# pyttsx3 only keeps engines in a WeakValueDictionary, so hold on to ours to
+# avoid reloading the driver per request. An engine runs one loop at a time,
+# hence the lock around speaking.
+_engine = None
+_engine_lock = threading.RLock()
+
+
+def get_engine():
+    """Return the shared pyttsx3 engine, initialising the driver on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            # Imported lazily so loading the speech blueprint does not initialise a TTS driver
+            import pyttsx3
+
+            _engine = pyttsx3.init()
+        return _engine
+
 
 def text_to_speech(text, lang='en', voice='default'):
     """
     Converts text to speech using pyttsx3.
     """
-    engine = pyttsx3.init()
+    engine = get_engine()
     
     # Set properties (optional)
     # engine.setProperty('rate', 150)  # Speed percent (can go over 100)
@@ -23,11 +42,12 @@ def text_to_speech(text, lang='en', voice='default'):
     # Set voice (optional)
     # engine.setProperty('voice', voices[0].id)  # 0 for male, 1 for female
 
-    # Synthesize speech
-    engine.say(text)
-    
-    # Wait for speech to finish
-    engine.runAndWait()
+    with _engine_lock:
+        # Synthesize speech
+        engine.say(text)
+
+        # Wait for speech to finish
+        engine.runAndWait()
     
     # For now, we don't have a way to return the audio file directly.
     # In a real application, you would save the audio to a file and return the URL.
@@ -1,10 +1,30 @@
 -- Placeholder for database schema
 
+CREATE EXTENSION IF NOT EXISTS vector;
+
 CREATE TABLE IF NOT EXISTS documents (
-    id VARCHAR(255) PRIMARY KEY,
+    namespace VARCHAR(255) NOT NULL DEFAULT 'default',
+    id VARCHAR(255) NOT NULL,
     content TEXT NOT NULL,
     embedding VECTOR(384),
-    metadata JSONB
+    metadata JSONB,
+    PRIMARY KEY (namespace, id)
 );
 
-CREATE INDEX IF NOT EXISTS documents_embedding_idx ON documents USING hnsw (embedding vector_l2_ops);
+-- Upgrade databases created before namespaces were added: key documents by
+-- (namespace, id) and replace the global ANN index with per-namespace ones
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'documents' AND column_name = 'namespace'
+    ) THEN
+        ALTER TABLE documents ADD COLUMN namespace VARCHAR(255) NOT NULL DEFAULT 'default';
+        ALTER TABLE documents DROP CONSTRAINT IF EXISTS documents_pkey;
+        ALTER TABLE documents ADD PRIMARY KEY (namespace, id);
+        DROP INDEX IF EXISTS documents_embedding_idx;
+    END IF;
+END $$;
+
+-- ANN indexes (HNSW or IVFFlat) are partial indexes per namespace, created and
+-- tuned by rag/store_pgvector.py (ensure_namespace_index).
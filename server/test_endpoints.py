@@ -86,6 +86,65 @@ def test_ocr_image():
         print(f"OCR image test failed: {e}")
         return False
 
+def test_llm_batch():
+    """Test the LLM batch endpoint"""
+    print("\nTesting LLM batch...")
+    try:
+        payload = {
+            "text": "Artificial intelligence is transforming industries.",
+            "tasks": ["summarize", "detect_language"],
+            "stream": False
+        }
+        
+        response = requests.post(f"{BASE_URL}/llm/batch", json=payload)
+        print(f"LLM batch status: {response.status_code}")
+        print(f"Response: {response.json()}")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"LLM batch test failed: {e}")
+        return False
+
+def test_metrics():
+    """Test the Prometheus metrics endpoint"""
+    print("\nTesting metrics...")
+    try:
+        response = requests.get(f"{BASE_URL}/metrics")
+        print(f"Metrics status: {response.status_code}")
+        # Plain-text Prometheus exposition format, so print only the start
+        print(f"Response: {response.text[:200]}")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"Metrics test failed: {e}")
+        return False
+
+def test_warmup():
+    """Test the warmup report endpoint"""
+    print("\nTesting warmup...")
+    try:
+        response = requests.get(f"{BASE_URL}/warmup")
+        print(f"Warmup status: {response.status_code}")
+        print(f"Response: {response.json()}")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"Warmup test failed: {e}")
+        return False
+
+def test_jobs():
+    """Test the background jobs endpoints"""
+    print("\nTesting jobs...")
+    try:
+        response = requests.get(f"{BASE_URL}/jobs")
+        print(f"Jobs list status: {response.status_code}")
+        print(f"Response: {response.json()}")
+        # Submitting an unknown kind should be rejected without queueing anything
+        rejected = requests.post(f"{BASE_URL}/jobs", json={"kind": "unknown"})
+        print(f"Jobs submit status: {rejected.status_code}")
+        print(f"Response: {rejected.json()}")
+        return response.status_code == 200 and rejected.status_code == 400
+    except Exception as e:
+        print(f"Jobs test failed: {e}")
+        return False
+
 if __name__ == "__main__":
     print("AI Assistant Server Endpoint Test Script")
     print("=" * 40)
@@ -104,6 +163,12 @@ if __name__ == "__main__":
         # Test OCR endpoint
         ocr_ok = test_ocr_image()
         
+        # Test batch, metrics, warmup and jobs endpoints
+        batch_ok = test_llm_batch()
+        metrics_ok = test_metrics()
+        warmup_ok = test_warmup()
+        jobs_ok = test_jobs()
+        
         print("\n" + "=" * 40)
         print("Test Summary:")
         print(f"Health Check: {'PASS' if health_ok else 'FAIL'}")
@@ -111,5 +176,9 @@ if __name__ == "__main__":
         print(f"Chat: {'PASS' if chat_ok else 'FAIL'}")
         print(f"PDF Extract: {'PASS' if pdf_ok else 'FAIL'}")
         print(f"OCR Image: {'PASS' if ocr_ok else 'FAIL'}")
+        print(f"LLM Batch: {'PASS' if batch_ok else 'FAIL'}")
+        print(f"Metrics: {'PASS' if metrics_ok else 'FAIL'}")
+        print(f"Warmup: {'PASS' if warmup_ok else 'FAIL'}")
+        print(f"Jobs: {'PASS' if jobs_ok else 'FAIL'}")
     else:
         print("Server is not responding. Please check that it's running.")
\ No newline at end of file
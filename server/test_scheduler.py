@@ -0,0 +1,154 @@
+"""
+Tests for admission control (services/scheduler.py).
+Run with pytest, or directly with `python test_scheduler.py`.
+"""
+
+import threading
+import time
+
+from flask import Flask
+
+from config import Config
+from services import scheduler as scheduler_module
+from services.scheduler import BULK, INTERACTIVE, RateLimiter, Scheduler
+
+
+def make_scheduler(slots=1, bulk_slots=1, interactive_queue=4, bulk_queue=4, timeout=2.0):
+    return Scheduler(slots, bulk_slots, {INTERACTIVE: interactive_queue, BULK: bulk_queue}, timeout)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not reached in time')
+        time.sleep(0.005)
+
+
+def test_interactive_served_before_bulk():
+    """A freed slot goes to a waiting interactive request even if bulk queued first"""
+    sched = make_scheduler()
+    assert sched.acquire(INTERACTIVE)[0]
+    order = []
+
+    def run(cls):
+        admitted, _, _ = sched.acquire(cls)
+        order.append(cls)
+        if admitted:
+            sched.release(cls)
+
+    bulk = threading.Thread(target=run, args=(BULK,))
+    bulk.start()
+    wait_until(lambda: sched.stats()['queued'][BULK] == 1)
+    interactive = threading.Thread(target=run, args=(INTERACTIVE,))
+    interactive.start()
+    wait_until(lambda: sched.stats()['queued'][INTERACTIVE] == 1)
+
+    sched.release(INTERACTIVE)
+    bulk.join(2)
+    interactive.join(2)
+    assert order == [INTERACTIVE, BULK]
+    assert sched.stats()['free'] == 1
+
+
+def test_bulk_limited_to_bulk_slots():
+    """Bulk work cannot take more than its share of the slots"""
+    sched = make_scheduler(slots=2, bulk_slots=1, bulk_queue=0)
+    assert sched.acquire(BULK)[0]
+    assert sched.acquire(BULK) == (False, 'queue_full', 0.0)
+    assert sched.acquire(INTERACTIVE)[0]
+
+
+def test_queue_full_rejects_immediately():
+    sched = make_scheduler(interactive_queue=0)
+    assert sched.acquire(INTERACTIVE)[0]
+    start = time.perf_counter()
+    assert sched.acquire(INTERACTIVE) == (False, 'queue_full', 0.0)
+    assert time.perf_counter() - start < 0.1
+
+
+def test_queue_timeout_rejects_and_frees_queue_space():
+    sched = make_scheduler(timeout=0.05)
+    assert sched.acquire(INTERACTIVE)[0]
+    admitted, reason, waited = sched.acquire(INTERACTIVE)
+    assert (admitted, reason) == (False, 'timeout')
+    assert waited >= 0.05
+    assert sched.stats()['queued'][INTERACTIVE] == 0
+    # The timed-out waiter must not be handed the slot on release
+    sched.release(INTERACTIVE)
+    assert sched.stats()['free'] == 1
+
+
+def test_bucket_refill():
+    limiter = RateLimiter({INTERACTIVE: (20.0, 2)})
+    assert limiter.allow('a', INTERACTIVE) == (True, 0.0)
+    assert limiter.allow('a', INTERACTIVE) == (True, 0.0)
+    allowed, retry_after = limiter.allow('a', INTERACTIVE)
+    assert not allowed
+    assert 0 < retry_after <= 0.05
+    # Other clients have their own bucket
+    assert limiter.allow('b', INTERACTIVE)[0]
+    time.sleep(retry_after + 0.01)
+    assert limiter.allow('a', INTERACTIVE)[0]
+    assert not limiter.allow('a', INTERACTIVE)[0]
+
+
+def make_app(sched):
+    """Flask app with the admission hooks and one interactive route that blocks until released."""
+    app = Flask(__name__)
+    release = threading.Event()
+
+    @app.route('/slow')
+    def slow():
+        release.wait(2)
+        return 'ok'
+
+    scheduler_module.init_app(app)
+    scheduler_module.scheduler = sched
+    scheduler_module.rate_limiter = RateLimiter({INTERACTIVE: (1000.0, 1000), BULK: (1000.0, 1000)})
+    return app, release
+
+
+def rejected_while_busy(sched):
+    """Hold the only slot with one request and return the response to a second one"""
+    original = scheduler_module.scheduler, scheduler_module.rate_limiter, Config.SCHEDULER_ENABLED
+    Config.SCHEDULER_ENABLED = True
+    try:
+        app, release = make_app(sched)
+        holder = threading.Thread(target=lambda: app.test_client().get('/slow'))
+        holder.start()
+        wait_until(lambda: sched.stats()['free'] == 0)
+        response = app.test_client().get('/slow')
+        release.set()
+        holder.join(2)
+        return response
+    finally:
+        scheduler_module.scheduler, scheduler_module.rate_limiter, Config.SCHEDULER_ENABLED = original
+
+
+def test_queue_full_returns_429():
+    response = rejected_while_busy(make_scheduler(interactive_queue=0))
+    assert response.status_code == 429
+    assert response.get_json()['reason'] == 'queue_full'
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_queue_timeout_returns_429():
+    sched = make_scheduler(timeout=0.05)
+    response = rejected_while_busy(sched)
+    assert response.status_code == 429
+    assert response.get_json()['reason'] == 'timeout'
+    assert sched.stats()['free'] == 1
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"{test.__name__}: PASS")
+        except Exception as e:
+            failed += 1
+            print(f"{test.__name__}: FAIL ({e!r})")
+    raise SystemExit(1 if failed else 0)
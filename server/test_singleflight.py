@@ -0,0 +1,137 @@
+"""
+Tests for single-flight request coalescing (services/singleflight.py).
+Run with pytest, or directly with `python test_singleflight.py`.
+"""
+
+import threading
+import time
+
+from services.singleflight import SingleFlight, normalize_text, request_key
+
+
+def start_leader(flight, key, fn):
+    """Run fn as the leader for key on a thread and wait until it is in flight"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = flight.do(key, fn)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 2
+    while flight.in_flight() == 0:
+        assert time.monotonic() < deadline, 'leader never started'
+        time.sleep(0.005)
+    return thread, outcome
+
+
+def start_followers(flight, key, count, fn, timeout=None):
+    outcomes = [{} for _ in range(count)]
+
+    def run(outcome):
+        try:
+            outcome['result'] = flight.do(key, fn, timeout=timeout)
+        except Exception as e:
+            outcome['error'] = e
+
+    threads = [threading.Thread(target=run, args=(outcome,)) for outcome in outcomes]
+    for thread in threads:
+        thread.start()
+    # Give the followers time to join the in-flight call
+    time.sleep(0.05)
+    return threads, outcomes
+
+
+def test_followers_share_leader_result():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(2)
+        return 'summary'
+
+    leader, leader_outcome = start_leader(flight, 'k', work)
+    followers, outcomes = start_followers(flight, 'k', 3, work)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert leader_outcome == {'result': 'summary'}
+    assert outcomes == [{'result': 'summary'}] * 3
+    assert flight.in_flight() == 0
+
+
+def test_followers_receive_leader_error():
+    flight = SingleFlight('test')
+    release = threading.Event()
+    error = ValueError('upstream failed')
+
+    def work():
+        release.wait(2)
+        raise error
+
+    leader, leader_outcome = start_leader(flight, 'k', work)
+    followers, outcomes = start_followers(flight, 'k', 2, work)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert leader_outcome['error'] is error
+    assert all(outcome['error'] is error for outcome in outcomes)
+    assert flight.in_flight() == 0
+
+
+def test_follower_timeout():
+    flight = SingleFlight('test')
+    release = threading.Event()
+
+    leader, leader_outcome = start_leader(flight, 'k', lambda: release.wait(2) and 'late')
+    followers, outcomes = start_followers(flight, 'k', 1, lambda: 'unused', timeout=0.01)
+    followers[0].join(2)
+    assert isinstance(outcomes[0]['error'], TimeoutError)
+
+    # The leader is not interrupted and still completes
+    release.set()
+    leader.join(2)
+    assert leader_outcome == {'result': 'late'}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight('test')
+    calls = []
+
+    def work():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do('a', work) == 1
+    # Nothing is cached once the call has finished
+    assert flight.do('a', work) == 2
+    assert flight.do('b', work) == 3
+
+
+def test_request_key_normalization():
+    assert normalize_text('  some\n text\t here ') == 'some text here'
+    assert normalize_text(None) == ''
+    assert request_key('summarize', normalize_text('a  b')) == request_key('summarize', 'a b')
+    # Length-prefixing keeps ('ab', 'c') and ('a', 'bc') apart
+    assert request_key('ab', 'c') != request_key('a', 'bc')
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith('test_')]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"{test.__name__}: PASS")
+        except Exception as e:
+            failed += 1
+            print(f"{test.__name__}: FAIL ({e!r})")
+    raise SystemExit(1 if failed else 0)